@@ -1,26 +1,190 @@
 import sys
 import os
+import time
+import argparse
+import traceback
 import importlib.util
+from concurrent.futures import ProcessPoolExecutor
 
 scripts_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plotting_scripts")
 sys.path.append(scripts_dir)
 
-scripts_to_run = [
-    "auto_correlation_gf",
-    "auto_correlation_us",
-    "eom_couplings_gf",
-    "eom_couplings_TI_energy",
-    "eom_gf",
-    "eom_mag_energy_trans_inv",
-    "eom_trans_inv_el",
-    "eom_us",
+import build_cache
+import profiling
+import figures
+import figure_specs
+
+# Figures of plotting_scripts/figure_specs.py, built by plotting_scripts/figures.py,
+# followed by the plotting scripts that are not described by a specification.
+scripts_to_run = list(figure_specs.figures) + [
     "grad_eom_gf", # This script takes much longer to run, comment it out if not needed
 ]
 
+# Data files (glob patterns) read and figures written by every plotting script.
+# Keep these in sync with the scripts, they decide when a figure has to be rebuilt.
+# For the figures of figure_specs.py they are derived from the specifications.
+script_inputs = {
+    "grad_eom_gf": ["data/grad_gf/L_4_g_*_gf_*/*.npz"],
+}
+script_outputs = {
+    "grad_eom_gf": ["figures/eom_gf_grad.pdf"],
+}
+for name in figure_specs.figures:
+    script_inputs[name] = figures.inputs(name)
+    script_outputs[name] = figures.outputs(name)
+
+cache_file = ".build_cache.json"
+
+
+def script_file(name):
+    """File of a plotting script. The figures of figure_specs.py depend on the figure engine and the specifications."""
+    if name in figure_specs.figures:
+        return os.path.join(scripts_dir, "figures.py")
+    return os.path.join(scripts_dir, f"{name}.py")
+
+
+def load_script(name):
+    """Import a plotting script as the module name."""
+    spec = importlib.util.spec_from_file_location(name, script_file(name))
+    module = importlib.util.module_from_spec(spec)
+    # Registered so that its functions can be pickled, e.g. for the process pool of grad_eom_gf
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_script(name):
+    """Build a figure of figure_specs.py, or import and run the main() of a plotting script.
+    Figures built in the same process share the arrays they read, see dataset_cache.py.
+
+    Returns:
+        tuple: (name, wall time in seconds, formatted traceback or None, profiling events)
+    """
+    start = time.perf_counter()
+    try:
+        with profiling.script(name):
+            if name in figure_specs.figures:
+                figures.build(name)
+            else:
+                load_script(name).main()
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+    return name, time.perf_counter() - start, error, profiling.drain()
+
+
+def init_worker():
+    """Every worker process renders with its own non-interactive backend."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def run_scripts(names, workers=1):
+    """Run the plotting scripts, in parallel processes if workers > 1.
+
+    Returns:
+        list of tuples: (name, wall time in seconds, formatted traceback or None, profiling events) per script
+    """
+    if workers <= 1:
+        return [run_script(name) for name in names]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        return list(executor.map(run_script, names))
+
+
 if __name__ == "__main__":
-    for name in scripts_to_run:
-        file_path = os.path.join(scripts_dir, f"{name}.py")
-        spec = importlib.util.spec_from_file_location(name, file_path)
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
-        module.main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate all of the plots used in the paper.")
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=1,
+        help="number of scripts to run in parallel processes (default: 1, sequential)",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="rerun all scripts, even if their code and data did not change since the last run",
+    )
+    parser.add_argument(
+        "-p",
+        "--profile",
+        nargs="?",
+        const=profiling.default_dir,
+        help=f"record the time and memory of every stage and write a trace to this directory (default: {profiling.default_dir})",
+    )
+    parser.add_argument(
+        "--chrome-trace",
+        action="store_true",
+        help="with --profile, also write a Chrome trace-event file",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="with --profile, also trace the allocated bytes of every stage (slows down matplotlib considerably)",
+    )
+    parser.add_argument(
+        "scripts",
+        nargs="*",
+        default=scripts_to_run,
+        help="scripts to run (default: all)",
+    )
+    args = parser.parse_args()
+    # The workers inherit the environment, so they record their stages as well
+    if args.profile:
+        os.environ[profiling.env_var] = args.profile
+    if args.chrome_trace:
+        os.environ[profiling.chrome_env_var] = "1"
+    if args.profile_memory:
+        os.environ[profiling.memory_env_var] = "1"
+
+    start = time.perf_counter()
+    cache = build_cache.load_cache(cache_file)
+    digests = {
+        name: build_cache.script_digest(script_file(name), scripts_dir, script_inputs.get(name, []), cache)
+        for name in args.scripts
+        if os.path.isfile(script_file(name))
+    }
+    stale = [
+        name
+        for name in args.scripts
+        if args.force
+        or name not in digests
+        or build_cache.is_stale(name, digests[name], script_outputs.get(name, []), cache)
+    ]
+    for name in args.scripts:
+        if name not in stale:
+            print(f"{name:<28} up to date")
+
+    results = run_scripts(stale, args.workers)
+
+    failed = []
+    trace_events = []
+    for name, wall_time, error, events in results:
+        trace_events.extend(events)
+        print(f"{name:<28} {wall_time:8.2f} s {'FAILED' if error else 'ok'}")
+        if error:
+            print(error, file=sys.stderr)
+            failed.append(name)
+        else:
+            build_cache.record(name, digests[name], cache)
+    build_cache.save_cache(cache, cache_file)
+    print(f"{'total':<28} {time.perf_counter() - start:8.2f} s")
+
+    if profiling.enabled() and trace_events:
+        print("\nstage            wall [s]  self [s]   cpu [s]  max alloc [MiB]  max rss [MiB]")
+        for stage, total in profiling.summary(trace_events).items():
+            memory = [
+                f"{total[key] / 2**20:.1f}" if total[key] is not None else "-" for key in ("allocated", "max_rss")
+            ]
+            print(
+                f"{stage:<14} {total['wall']:9.2f} {total['self_wall']:9.2f} {total['cpu']:9.2f} "
+                f"{memory[0]:>16} {memory[1]:>14}"
+            )
+        for path in profiling.write_trace(trace_events):
+            print(f"Wrote profile trace {path}")
+
+    if failed:
+        print(f"Failed scripts: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,457 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import utils
+
+
+# ========= Benchmarks of the Statistics Functions ====================
+
+default_sizes = [10**3, 10**4, 10**5, 10**6, 10**7]
+stacked_columns = 8  # observables in the stacked inputs, shape (N, stacked_columns)
+stacked_max_size = 10**6  # larger stacked inputs do not fit in memory comfortably
+baseline_file = "benchmark_baseline.json"
+fingerprint_points = 1024  # values of every output stored to check the numerical agreement
+
+
+def ar1_chain(n, phi=0.9, columns=None, seed=0):
+    """Synthetic Markov chain timeseries x_t = phi * x_{t-1} + e_t with Gaussian noise e_t,
+    started from the stationary distribution. The integrated autocorrelation time is (1 + phi) / (2 (1 - phi)).
+    The recursion is solved exactly in blocks of 256 steps, so long chains are cheap to generate.
+
+    Args:
+        n (int): Number of samples
+        phi (float): Autocorrelation at lag 1
+        columns (int): Number of independent chains, stacked along the second axis. A single chain if None
+        seed (int): Seed of the random number generator
+
+    Returns:
+        np.ndarray: Timeseries, shape (n,) or (n, columns)
+    """
+    rng = np.random.default_rng(seed)
+    shape = (n,) if columns is None else (n, columns)
+    noise = rng.standard_normal(shape)
+    noise[0] /= np.sqrt(1 - phi**2)
+
+    block = 256
+    n_blocks = -(-n // block)
+    padded = np.zeros((n_blocks * block,) + shape[1:])
+    padded[:n] = noise
+    padded = padded.reshape((n_blocks, block) + shape[1:])
+    # Within a block x_i = sum_{j <= i} phi^(i - j) e_j + phi^(i + 1) x_(start - 1)
+    lags = np.arange(block)[:, None] - np.arange(block)[None, :]
+    propagator = np.where(lags >= 0, phi ** np.maximum(lags, 0), 0.0)
+    chain = np.einsum("ij,bj...->bi...", propagator, padded)
+    carry = phi ** np.arange(1, block + 1)
+    carry = carry.reshape((block,) + (1,) * (len(shape) - 1))
+    for b in range(1, n_blocks):
+        chain[b] += carry * chain[b - 1, -1]
+    return chain.reshape((n_blocks * block,) + shape[1:])[:n]
+
+
+def grad_inputs(n, columns=None, seed=0):
+    """Correlated (observable, gradient of the observable, gradient of the norm) timeseries for compute_grad_err."""
+    op = 1 + 0.1 * ar1_chain(n, 0.9, None, seed)
+    grad_norm = ar1_chain(n, 0.8, columns, seed + 1)
+    noise = ar1_chain(n, 0.5, columns, seed + 2)
+    op_column = op if columns is None else op[:, None]
+    op_grad = 0.3 * grad_norm * op_column + noise
+    return op, op_grad, grad_norm
+
+
+# name -> (function, inputs(n) -> args, whether the inputs are stacked)
+cases = {
+    "rebin_array": (lambda a: utils.rebin_array(a, 16), lambda n: (ar1_chain(n),), False),
+    "rebin_array[stacked]": (
+        lambda a: utils.rebin_array(a, 16),
+        lambda n: (ar1_chain(n, columns=stacked_columns),),
+        True,
+    ),
+    "rebin_error": (utils.rebin_error, lambda n: (ar1_chain(n),), False),
+    "rebin_error[stacked]": (
+        utils.rebin_error,
+        lambda n: (ar1_chain(n, columns=stacked_columns),),
+        True,
+    ),
+    "rebin_eom": (utils.rebin_eom, lambda n: (ar1_chain(n),), False),
+    "rebin_eom[stacked]": (
+        utils.rebin_eom,
+        lambda n: (ar1_chain(n, columns=stacked_columns),),
+        True,
+    ),
+    "autocorr_fft": (utils.autocorr_fft, lambda n: (ar1_chain(n),), False),
+    "autocorr_fft[stacked]": (
+        utils.autocorr_fft,
+        lambda n: (ar1_chain(n, columns=stacked_columns),),
+        True,
+    ),
+    "autocorr_rebin_eom": (utils.autocorr_rebin_eom, lambda n: (ar1_chain(n),), False),
+    "autocorr_binsize[stacked]": (
+        utils.autocorr_binsize,
+        lambda n: (ar1_chain(n, columns=stacked_columns),),
+        True,
+    ),
+    "jackknife_resampling": (utils.jackknife_resampling, lambda n: (ar1_chain(n),), False),
+    "jackknife_resampling[stacked]": (
+        utils.jackknife_resampling,
+        lambda n: (ar1_chain(n, columns=stacked_columns),),
+        True,
+    ),
+    "compute_grad_err": (utils.compute_grad_err, lambda n: grad_inputs(n), False),
+    "compute_grad_err_batch[stacked]": (
+        utils.compute_grad_err_batch,
+        lambda n: grad_inputs(n, stacked_columns),
+        True,
+    ),
+    "compute_grad_mean_batch[stacked]": (
+        utils.compute_grad_mean_batch,
+        lambda n: grad_inputs(n, stacked_columns),
+        True,
+    ),
+}
+
+
+# ========= Reference Implementations ====================
+#
+# Straightforward loop versions of the statistics functions, as they were before they were vectorized.
+# The outputs of the cases are checked against them on every run, independent of the baseline file.
+
+reference_size = 2000  # samples of the inputs for the agreement check, the references are slow
+
+
+def reference_rebin_array(a, R):
+    """Rebin a single timeseries into bins of length R (the 1-d branch of the original rebin_array)."""
+    max_fit = int(len(a) - len(a) % R)
+    return np.mean(a[:max_fit].reshape(-1, R), axis=1)
+
+
+def reference_rebin_error(arr):
+    N = len(arr)
+    max_exp = int(np.floor(np.log2(N / 10)))
+    rangevals = [2**i for i in range(max_exp + 1)]
+    eomarr = []
+    stdarr = []
+    meanarr = []
+    for i in rangevals:
+        data_rebin = reference_rebin_array(arr, i)
+        eom = np.std(data_rebin, ddof=1) / np.sqrt(len(data_rebin))
+        std = np.std(data_rebin, ddof=1)
+        eomarr.append(eom)
+        meanarr.append(np.mean(data_rebin))
+        stdarr.append(std)
+    return rangevals, meanarr, eomarr, stdarr
+
+
+def reference_rebin_error_stacked(arr):
+    """reference_rebin_error of every column, arranged like the output of rebin_error on stacked inputs."""
+    columns = [reference_rebin_error(arr[:, i]) for i in range(arr.shape[1])]
+    rangevals = columns[0][0]
+    levels = range(len(rangevals))
+    return (rangevals,) + tuple([np.array([c[k][level] for c in columns]) for level in levels] for k in (1, 2, 3))
+
+
+def reference_rebin_eom(arr, num_of_bins=20):
+    N = len(arr)
+    max_exp = int(np.floor(np.log2(N / (num_of_bins / 2))))
+    if max_exp > 0:
+        data_rebin = reference_rebin_array(arr, 2 ** (max_exp - 1))
+    else:
+        data_rebin = arr
+    return np.std(data_rebin, ddof=1) / np.sqrt(len(data_rebin))
+
+
+def reference_autocorr_fft(arr):
+    arr = arr - np.mean(arr)
+    fft_vals = np.fft.fft(arr)
+    spectrum = fft_vals * np.conjugate(fft_vals)
+    dest = np.fft.ifft(spectrum)
+    return dest / dest[0]
+
+
+def reference_decay_time(arr):
+    """First lag at which two consecutive elements of the autocorrelation are below 1/100, at most N/10."""
+    N = len(arr)
+    autocorr_array = reference_autocorr_fft(arr)
+    for i in range(len(autocorr_array)):
+        if i >= N / 10:
+            return i
+        elif autocorr_array[i] <= 1 / 100 and autocorr_array[i + 1] <= 1 / 100:
+            return i
+
+
+def reference_jackknife_resampling(data):
+    n = len(data)
+    indices = np.arange(n)
+    resamples = np.zeros(n)
+    for i in range(n):
+        resamples[i] = np.mean(data[indices != i])
+    return resamples
+
+
+def reference_jackknife_error(op_datavec, op_grad_datavec, grad_norm_datavec):
+    op_datavec_resamples = reference_jackknife_resampling(op_datavec)
+    op_grad_datavec_resamples = reference_jackknife_resampling(op_grad_datavec)
+    grad_norm_datavec_resamples = reference_jackknife_resampling(grad_norm_datavec)
+    op_times_grad_norm_resamples = reference_jackknife_resampling(op_datavec * grad_norm_datavec)
+    grad_jacknife = (
+        op_grad_datavec_resamples
+        + op_times_grad_norm_resamples
+        - op_datavec_resamples * grad_norm_datavec_resamples
+    )
+    n = len(grad_jacknife)
+    return np.sqrt((n - 1) * np.mean((grad_jacknife - np.mean(grad_jacknife)) ** 2))
+
+
+def reference_compute_grad_err(op_datavec, op_grad_datavec, grad_norm_datavec):
+    binsize = max(reference_decay_time(x) for x in (op_datavec, op_grad_datavec, grad_norm_datavec))
+    return reference_jackknife_error(
+        utils.rebin_array(op_datavec, binsize),
+        utils.rebin_array(op_grad_datavec, binsize),
+        utils.rebin_array(grad_norm_datavec, binsize),
+    )
+
+
+def reference_compute_grad_mean(op_datavec, op_grad_datavec, grad_norm_datavec):
+    return np.mean(op_grad_datavec + op_datavec * grad_norm_datavec) - np.mean(op_datavec) * np.mean(grad_norm_datavec)
+
+
+def per_column(func):
+    """Apply a reference to every column of stacked inputs, the observable (1-d) is shared by all columns."""
+
+    def stacked(*args):
+        columns = [np.shape(arg)[1] for arg in args if np.ndim(arg) == 2][0]
+        results = [func(*(arg[:, i] if np.ndim(arg) == 2 else arg for arg in args)) for i in range(columns)]
+        return np.stack(results, axis=-1)
+
+    return stacked
+
+
+# case -> reference implementation with the same arguments
+references = {
+    "rebin_array": lambda a: reference_rebin_array(a, 16),
+    "rebin_array[stacked]": per_column(lambda a: reference_rebin_array(a, 16)),
+    "rebin_error": reference_rebin_error,
+    "rebin_error[stacked]": reference_rebin_error_stacked,
+    "rebin_eom": reference_rebin_eom,
+    "rebin_eom[stacked]": per_column(reference_rebin_eom),
+    "jackknife_resampling": reference_jackknife_resampling,
+    "jackknife_resampling[stacked]": per_column(reference_jackknife_resampling),
+    "autocorr_binsize[stacked]": per_column(reference_decay_time),
+    "compute_grad_err": reference_compute_grad_err,
+    "compute_grad_err_batch[stacked]": per_column(reference_compute_grad_err),
+    "compute_grad_mean_batch[stacked]": per_column(reference_compute_grad_mean),
+}
+
+
+def flat_values(result):
+    """All values of an output as a flat array, tuples and lists are concatenated."""
+    if isinstance(result, (tuple, list)):
+        return np.concatenate([flat_values(item) for item in result]) if result else np.empty(0)
+    return np.ravel(np.asarray(result, dtype=float))
+
+
+def check_references(names, rtol=1e-8, atol=1e-12):
+    """Compare the cases that have a reference implementation with it, on inputs of reference_size samples.
+
+    Returns:
+        list: Problems found, one string per disagreement
+    """
+    problems = []
+    for name in names:
+        if name not in references:
+            continue
+        func, make_inputs, _ = cases[name]
+        args = make_inputs(reference_size)
+        result, expected = flat_values(func(*args)), flat_values(references[name](*args))
+        if result.shape != expected.shape or not np.allclose(result, expected, rtol=rtol, atol=atol):
+            problems.append(f"{name}: output differs from the reference implementation")
+    return problems
+
+
+# ========= Timing and Comparison with the Baseline ====================
+
+
+def fingerprint(result):
+    """Reduce the output of a function to a short list of numbers, to compare it with the baseline.
+    Tuples and lists are flattened, and large arrays are sampled at evenly spaced indices."""
+    if isinstance(result, (tuple, list)):
+        return [value for item in result for value in fingerprint(item)]
+    arr = np.asarray(result)
+    if np.iscomplexobj(arr):
+        return fingerprint(arr.real) + fingerprint(arr.imag)
+    arr = arr.astype(float).ravel()
+    if arr.size > fingerprint_points:
+        arr = arr[np.linspace(0, arr.size - 1, fingerprint_points).astype(int)]
+    return [float(arr.size)] + arr.tolist()
+
+
+def time_call(func, args, min_time=0.2, max_repeat=50):
+    """Best wall time of func(*args) over repeated calls, running for at least min_time in total."""
+    best = np.inf
+    total = 0.0
+    repeat = 0
+    while repeat < max_repeat and (repeat == 0 or total < min_time):
+        start = time.perf_counter()
+        result = func(*args)
+        wall = time.perf_counter() - start
+        best = min(best, wall)
+        total += wall
+        repeat += 1
+    return best, result
+
+
+def peak_memory(func, args):
+    """Peak memory in bytes allocated by func(*args) (numpy allocations are traced by tracemalloc)."""
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(names, sizes):
+    """Time every case at every size.
+
+    Returns:
+        dict: "<case>@<N>" -> {"time": seconds, "peak_memory": bytes, "fingerprint": list}
+    """
+    results = {}
+    for name in names:
+        func, make_inputs, stacked = cases[name]
+        for n in sizes:
+            if stacked and n > stacked_max_size:
+                continue
+            args = make_inputs(n)
+            wall, result = time_call(func, args)
+            results[f"{name}@{n}"] = {
+                "time": wall,
+                "peak_memory": peak_memory(func, args),
+                "fingerprint": fingerprint(result),
+            }
+            print(
+                f"{name:<34} N={n:<9} {wall * 1e3:12.3f} ms {results[f'{name}@{n}']['peak_memory'] / 2**20:10.1f} MiB",
+                flush=True,
+            )
+    return results
+
+
+def compare(results, baseline, tolerance, rtol=1e-8, atol=1e-12):
+    """Compare the results with the baseline.
+
+    Args:
+        tolerance (float): Allowed ratio of time and peak memory relative to the baseline
+
+    Returns:
+        list: Problems found, one string per regression or disagreement
+    """
+    problems = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        reference = baseline[key]
+        if len(reference["fingerprint"]) != len(result["fingerprint"]) or not np.allclose(
+            result["fingerprint"], reference["fingerprint"], rtol=rtol, atol=atol, equal_nan=True
+        ):
+            problems.append(f"{key}: output differs from the baseline")
+        # Timings below a millisecond are dominated by noise
+        if result["time"] > tolerance * reference["time"] and result["time"] > 1e-3:
+            problems.append(
+                f"{key}: time {result['time'] * 1e3:.3f} ms, baseline {reference['time'] * 1e3:.3f} ms"
+            )
+        if result["peak_memory"] > tolerance * reference["peak_memory"] + 2**20:
+            problems.append(
+                f"{key}: peak memory {result['peak_memory'] / 2**20:.1f} MiB, "
+                f"baseline {reference['peak_memory'] / 2**20:.1f} MiB"
+            )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the statistics functions in utils.py on synthetic AR(1) chains."
+    )
+    parser.add_argument(
+        "cases",
+        nargs="*",
+        default=list(cases),
+        help="cases to run (default: all)",
+    )
+    parser.add_argument(
+        "-n",
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=default_sizes,
+        help="numbers of samples (default: 10^3 ... 10^7)",
+    )
+    parser.add_argument(
+        "-b",
+        "--baseline",
+        default=baseline_file,
+        help=f"baseline file (default: {baseline_file})",
+    )
+    parser.add_argument(
+        "-s",
+        "--save",
+        action="store_true",
+        help="store the results as the new baseline instead of comparing with it",
+    )
+    parser.add_argument(
+        "-t",
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="allowed ratio of time and peak memory relative to the baseline (default: 1.5)",
+    )
+    args = parser.parse_args()
+
+    unknown = [name for name in args.cases if name not in cases]
+    if unknown:
+        print(f"Unknown cases: {', '.join(unknown)}. Available: {', '.join(cases)}")
+        sys.exit(2)
+
+    mismatches = check_references(args.cases)
+    for problem in mismatches:
+        print(f"MISMATCH {problem}")
+    if mismatches:
+        sys.exit(1)
+
+    results = run_benchmarks(args.cases, args.sizes)
+
+    if args.save:
+        baseline = {}
+        if os.path.isfile(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f)
+        print(f"Saved {len(results)} results to {args.baseline}")
+        return
+
+    if not os.path.isfile(args.baseline):
+        print(f"No baseline found at {args.baseline}, run with --save to create one")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    problems = compare(results, baseline, args.tolerance)
+    missing = sum(key not in baseline for key in results)
+    if missing:
+        print(f"{missing} results have no baseline")
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    if problems:
+        sys.exit(1)
+    print("All results agree with the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ========= Blocked Bootstrap Resampling ====================
+
+# Resamples are generated and evaluated in batches, with at most this many bytes per index array
+max_batch_bytes = 2**26
+
+
+def default_block_length(n):
+    """Rule of thumb n^(1/3) for the block length. For autocorrelated data, a block length
+    of the order of the decay time of the autocorrelation (see utils.autocorr_binsize) is better."""
+    return max(1, int(round(n ** (1 / 3))))
+
+
+def bootstrap_indices(n, num_resamples, block_length, method="moving", rng=None):
+    """Generate the sample indices of blocked bootstrap resamples, as one integer array.
+
+    "moving": moving block bootstrap, the resamples are ceil(n / block_length) blocks of
+        block_length consecutive samples with uniformly distributed starts, cut to n samples.
+    "stationary": stationary bootstrap (Politis and Romano), the blocks have geometrically
+        distributed lengths with mean block_length and wrap around the end of the timeseries.
+
+    Args:
+        n (int): Number of samples
+        num_resamples (int): Number of resamples
+        block_length (int): (Mean) length of the blocks. 1 gives the ordinary bootstrap
+        method (str): "moving" or "stationary"
+        rng (np.random.Generator): Random number generator, a new unseeded one if None
+
+    Returns:
+        np.ndarray: Sample indices, shape (num_resamples, n)
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    block_length = int(min(max(block_length, 1), n))
+    if method == "moving":
+        num_of_blocks = -(-n // block_length)
+        starts = rng.integers(0, n - block_length + 1, size=(num_resamples, num_of_blocks, 1))
+        indices = starts + np.arange(block_length)
+        return indices.reshape(num_resamples, -1)[:, :n]
+    elif method == "stationary":
+        positions = np.arange(n)
+        new_block = rng.random((num_resamples, n)) < 1 / block_length
+        new_block[:, 0] = True
+        starts = rng.integers(0, n, size=(num_resamples, n))
+        # Position at which the current block began, and the sample it started with
+        block_position = np.maximum.accumulate(np.where(new_block, positions, 0), axis=1)
+        block_start = np.take_along_axis(starts, block_position, axis=1)
+        return (block_start + positions - block_position) % n
+    raise ValueError(f"Unknown method '{method}' for bootstrap_indices")
+
+
+def resample_means(datavecs, indices):
+    """Means of the datavecs over every resample.
+    The means are computed as (number of times every sample is drawn) @ data, a single matrix
+    product per datavec, so the resampled data itself is never built.
+
+    Args:
+        datavecs (list of np.ndarray): Timeseries, shape (n, ...)
+        indices (np.ndarray): Sample indices of the resamples, shape (num_resamples, n)
+
+    Returns:
+        list of np.ndarray: Means of every datavec, shape (num_resamples, ...)
+    """
+    num_resamples, n = indices.shape
+    offsets = (np.arange(num_resamples) * n)[:, None]
+    counts = np.bincount((indices + offsets).ravel(), minlength=num_resamples * n)
+    weights = counts.reshape(num_resamples, n) / n
+    means = []
+    for datavec in datavecs:
+        datavec = np.asarray(datavec)
+        mean = weights @ datavec.reshape(n, -1)
+        means.append(mean.reshape((num_resamples,) + datavec.shape[1:]))
+    return means
+
+
+def bootstrap_resamples(
+    estimator,
+    *datavecs,
+    num_resamples=1000,
+    block_length=None,
+    method="moving",
+    seed=None,
+    workers=1,
+):
+    """Evaluate an estimator of the means of several timeseries on blocked bootstrap resamples.
+    All datavecs are resampled with the same indices, so their correlations are kept. The estimator
+    is called once per batch of resamples with the resampled means of every datavec, shape (batch, ...),
+    so it has to act element-wise (e.g. lambda x, y: x / y), like for jackknife.jackknife.
+
+    The resamples are reproducible for a given seed: every batch draws from its own generator,
+    spawned from the seed, independent of the number of workers.
+
+    Args:
+        estimator (callable): Function of the means of the datavecs (in the same order)
+        datavecs (np.ndarray): Timeseries with the samples along the first axis. They do not have to be rebinned,
+            the blocks keep the autocorrelation within a block
+        num_resamples (int): Number of resamples
+        block_length (int): (Mean) length of the blocks, default_block_length if None
+        method (str): "moving" or "stationary", see bootstrap_indices
+        seed (int or np.random.SeedSequence): Seed of the random number generators
+        workers (int): Number of threads that evaluate the batches of resamples
+
+    Returns:
+        np.ndarray: Estimator on every resample, shape (num_resamples, ...)
+    """
+    n = len(datavecs[0])
+    if block_length is None:
+        block_length = default_block_length(n)
+    batch_size = max(1, min(num_resamples, max_batch_bytes // (8 * n)))
+    batches = [min(batch_size, num_resamples - start) for start in range(0, num_resamples, batch_size)]
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    generators = [np.random.default_rng(child) for child in seed_sequence.spawn(len(batches))]
+
+    def evaluate(batch):
+        size, rng = batch
+        indices = bootstrap_indices(n, size, block_length, method, rng)
+        return np.asarray(estimator(*resample_means(datavecs, indices)))
+
+    if workers > 1 and len(batches) > 1:
+        # numpy releases the GIL in the matrix products, so threads are enough
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(evaluate, zip(batches, generators)))
+    else:
+        results = [evaluate(batch) for batch in zip(batches, generators)]
+    return np.concatenate(results, axis=0)
+
+
+def bootstrap_error(resamples, axis=0):
+    """Bootstrap error: the standard deviation of the estimator over the resamples."""
+    return np.std(resamples, axis=axis, ddof=1)
+
+
+def confidence_interval(resamples, level=0.6827, axis=0):
+    """Percentile confidence interval of an estimator from its bootstrap resamples.
+
+    Args:
+        resamples (np.ndarray): Estimator evaluated on every resample, along axis
+        level (float): Confidence level, 0.6827 corresponds to one standard deviation
+        axis (int): Axis of the resamples
+
+    Returns:
+        tuple: (lower bound, upper bound), the input shape without axis
+    """
+    lower, upper = np.quantile(resamples, [(1 - level) / 2, (1 + level) / 2], axis=axis)
+    return lower, upper
+
+
+def bootstrap(estimator, *datavecs, **kwargs):
+    """Blocked bootstrap estimation of a derived quantity of the means of several timeseries.
+    See bootstrap_resamples for the arguments.
+
+    Returns:
+        tuple of
+            mean: mean of the estimator over the bootstrap resamples
+            err: bootstrap error of the estimator
+    """
+    resamples = bootstrap_resamples(estimator, *datavecs, **kwargs)
+    return np.mean(resamples, axis=0), bootstrap_error(resamples)
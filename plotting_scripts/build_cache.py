@@ -0,0 +1,115 @@
+import os
+import ast
+import glob
+import json
+import hashlib
+
+
+# ========= Incremental Figure Builds ====================
+
+
+def load_cache(cache_file):
+    """Load the build cache, or return an empty one if it does not exist or cannot be read."""
+    try:
+        with open(cache_file) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    cache.setdefault("files", {})
+    cache.setdefault("scripts", {})
+    return cache
+
+
+def save_cache(cache, cache_file):
+    tmp_file = f"{cache_file}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(tmp_file, cache_file)
+
+
+def file_digest(path, cache):
+    """Content hash of a file. The hash is only recomputed if the size or the mtime of the file changed."""
+    stat = os.stat(path)
+    entry = cache["files"].get(path)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["digest"]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    cache["files"][path] = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "digest": h.hexdigest(),
+    }
+    return h.hexdigest()
+
+
+# Local modules that import the modules of a package by name at run time, which the ast scan of
+# imported_helpers cannot see, e.g. plotting.pyplot imports the requested style of plotting_formats
+runtime_imports = {"plotting": "plotting_formats"}
+
+
+def _module_file(module_name, scripts_dir):
+    base = os.path.join(scripts_dir, *module_name.split("."))
+    for candidate in (f"{base}.py", os.path.join(base, "__init__.py")):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def _package_files(package, scripts_dir):
+    return sorted(glob.glob(os.path.join(scripts_dir, package, "*.py")))
+
+
+def imported_helpers(file_path, scripts_dir):
+    """Find the files of the local modules (in scripts_dir) imported by a script, recursively.
+    A module of runtime_imports brings in every module of its package.
+
+    Returns:
+        list: Sorted paths of the helper modules, without file_path itself
+    """
+    helpers = set()
+    to_visit = [file_path]
+    while to_visit:
+        path = to_visit.pop()
+        with open(path) as f:
+            tree = ast.parse(f.read())
+        module_names = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                module_names += [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                module_names.append(node.module)
+                module_names += [f"{node.module}.{alias.name}" for alias in node.names]
+        module_name = os.path.splitext(os.path.relpath(path, scripts_dir))[0].replace(os.sep, ".")
+        if module_name in runtime_imports:
+            helpers.update(_package_files(runtime_imports[module_name], scripts_dir))
+        for module_name in module_names:
+            helper = _module_file(module_name, scripts_dir)
+            if helper and helper != file_path and helper not in helpers:
+                helpers.add(helper)
+                to_visit.append(helper)
+    return sorted(helpers)
+
+
+def script_digest(file_path, scripts_dir, input_patterns, cache):
+    """Hash of everything a script depends on: its code, the code of its helper modules
+    and the data files matched by its input glob patterns."""
+    data_files = sorted({f for pattern in input_patterns for f in glob.glob(pattern)})
+    h = hashlib.sha256()
+    for path in [file_path] + imported_helpers(file_path, scripts_dir) + data_files:
+        h.update(os.path.relpath(path).encode())
+        h.update(file_digest(path, cache).encode())
+    return h.hexdigest()
+
+
+def is_stale(name, digest, outputs, cache):
+    """A script has to be rerun if its inputs changed since the last successful run, or an output is missing."""
+    if cache["scripts"].get(name) != digest:
+        return True
+    return not all(os.path.isfile(output) for output in outputs)
+
+
+def record(name, digest, cache):
+    cache["scripts"][name] = digest
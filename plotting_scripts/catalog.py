@@ -0,0 +1,151 @@
+import os
+import sys
+import json
+import math
+import fnmatch
+import datasets
+import profiling
+
+
+# ========= Metadata Catalog of the Data Directory ====================
+
+
+def _entry(path, stat):
+    """Catalog entry of an archive: its scalar fields, and the shapes and dtypes of its arrays."""
+    fields = {}
+    shapes = {}
+    with datasets.open_dataset(path) as data:
+        for key in data.files:
+            value = data[key]
+            if value.ndim == 0:
+                fields[key] = value.item()
+            else:
+                shapes[key] = [list(value.shape), str(value.dtype)]
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "fields": fields,
+        "shapes": shapes,
+    }
+
+
+def load_catalog(catalog_file):
+    try:
+        with open(catalog_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_catalog(catalog, catalog_file):
+    tmp_file = f"{catalog_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(catalog, f, indent=1, sort_keys=True)
+    os.replace(tmp_file, catalog_file)
+
+
+def update_catalog(data_dir="data", catalog_file=None):
+    """Bring the catalog of all .npz archives below data_dir up to date.
+    Only new archives and archives whose size or mtime changed are opened,
+    entries of deleted archives are removed.
+
+    Args:
+        data_dir (str): Data directory
+        catalog_file (str): Path of the catalog, data_dir/.catalog.json if None
+
+    Returns:
+        dict: Catalog entry per archive path (relative to data_dir)
+    """
+    if catalog_file is None:
+        catalog_file = os.path.join(data_dir, ".catalog.json")
+    catalog = load_catalog(catalog_file)
+    changed = False
+    found = set()
+    for root, _, files in os.walk(data_dir):
+        for name in files:
+            if not name.endswith(".npz"):
+                continue
+            path = os.path.join(root, name)
+            rel_path = os.path.relpath(path, data_dir)
+            found.add(rel_path)
+            stat = os.stat(path)
+            entry = catalog.get(rel_path)
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                continue
+            try:
+                catalog[rel_path] = _entry(path, stat)
+                changed = True
+            except Exception as e:
+                print(f"Error cataloging {path}: {e}", file=sys.stderr)
+    for rel_path in set(catalog) - found:
+        del catalog[rel_path]
+        changed = True
+    if changed:
+        save_catalog(catalog, catalog_file)
+    return catalog
+
+
+_catalogs = {}  # data_dir -> (mtime of every directory below data_dir, catalog)
+
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def current_catalog(data_dir="data"):
+    """The catalog of data_dir, updated with update_catalog only if a directory below data_dir changed
+    since the last call of this process. Adding, removing or replacing (os.replace) an archive changes
+    the mtime of its directory, an archive that is rewritten in place is only noticed by update_catalog.
+
+    Returns:
+        dict: Catalog entry per archive path (relative to data_dir)
+    """
+    if data_dir in _catalogs:
+        mtimes, catalog = _catalogs[data_dir]
+        if all(_mtime_ns(directory) == mtime for directory, mtime in mtimes.items()):
+            return catalog
+    catalog = update_catalog(data_dir)
+    # After the update, which saves the catalog in data_dir
+    mtimes = {root: _mtime_ns(root) for root, _, _ in os.walk(data_dir)}
+    _catalogs[data_dir] = (mtimes, catalog)
+    return catalog
+
+
+def _matches(value, wanted):
+    if isinstance(wanted, (list, tuple, set)):
+        return any(_matches(value, w) for w in wanted)
+    if isinstance(value, float) and isinstance(wanted, (int, float)):
+        return math.isclose(value, wanted, rel_tol=1e-9)
+    return value == wanted
+
+
+@profiling.stage("discover")
+def select(dataset=None, pattern=None, data_dir="data", **fields):
+    """Select archives by dataset, filename and scalar fields, without opening them.
+
+    Example: select(dataset="gf", L=6, g=0.7857, c=["F", "c", "2", "T"])
+
+    Args:
+        dataset (str): Subdirectory of data_dir, e.g. "gf"
+        pattern (str): Glob pattern the filename has to match, e.g. "scalar_mag_ansatz_0.5*"
+        data_dir (str): Data directory
+        fields: Required values of scalar fields. A list, tuple or set matches any of its values.
+
+    Returns:
+        list of dicts: Catalog entries of the matching archives, sorted by path, with the keys
+            "path", "size", "mtime_ns", "fields" (scalar values) and "shapes" (array shapes and dtypes)
+    """
+    catalog = current_catalog(data_dir)
+    selected = []
+    for rel_path, entry in sorted(catalog.items()):
+        if dataset is not None and rel_path.split(os.sep)[0] != dataset:
+            continue
+        if pattern is not None and not fnmatch.fnmatch(os.path.basename(rel_path), pattern):
+            continue
+        if not all(key in entry["fields"] and _matches(entry["fields"][key], wanted) for key, wanted in fields.items()):
+            continue
+        selected.append(dict(entry, path=os.path.join(data_dir, rel_path)))
+    return selected
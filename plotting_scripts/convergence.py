@@ -0,0 +1,282 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import catalog
+import dataset_cache
+import streaming
+
+
+# ========= Convergence Monitoring and Early Stopping ====================
+
+
+def _valid_curve(steps, rel_eom, times=None):
+    """Points of a curve with a positive step number and a finite, positive EOM / mean
+    (the first point of the stored curves usually has no error yet). Invalid times become nan."""
+    steps = np.asarray(steps, dtype=float)
+    rel_eom = np.abs(np.asarray(rel_eom, dtype=float))
+    valid = (steps > 0) & np.isfinite(rel_eom) & (rel_eom > 0)
+    if times is None:
+        return steps[valid], rel_eom[valid], np.full(np.sum(valid), np.nan)
+    times = np.asarray(times, dtype=float)
+    times = np.where(np.isfinite(times) & (times >= 0), times, np.nan)
+    return steps[valid], rel_eom[valid], times[valid]
+
+
+def fit_inverse_sqrt(steps, rel_eom, tail_fraction=0.5):
+    """Fit EOM / mean = amplitude / sqrt(steps) to the tail of a convergence curve.
+    The amplitude is the median of rel_eom * sqrt(steps) over the last tail_fraction of the points,
+    which is robust against the fluctuations of the rebinning estimate.
+
+    Args:
+        steps (np.ndarray): Step numbers
+        rel_eom (np.ndarray): EOM / mean at the step numbers
+        tail_fraction (float): Fraction of the points (the last ones) used in the fit
+
+    Returns:
+        float: amplitude, nan if there are no valid points
+    """
+    steps, rel_eom, _ = _valid_curve(steps, rel_eom)
+    if not len(steps):
+        return np.nan
+    tail = slice(int(len(steps) * (1 - tail_fraction)), None)
+    return float(np.median(rel_eom[tail] * np.sqrt(steps[tail])))
+
+
+def fit_time_per_step(steps, times, tail_fraction=0.5):
+    """Seconds per step, from a linear fit of the times over the tail of a curve. nan without valid times."""
+    steps = np.asarray(steps, dtype=float)
+    times = np.asarray(times, dtype=float)
+    valid = (steps > 0) & np.isfinite(times) & (times >= 0)
+    steps, times = steps[valid], times[valid]
+    tail = slice(int(len(steps) * (1 - tail_fraction)), None)
+    if len(steps[tail]) < 2:
+        return times[-1] / steps[-1] if len(steps) else np.nan
+    return float(np.polyfit(steps[tail], times[tail], 1)[0])
+
+
+def steps_to_target(amplitude, target):
+    """Number of steps at which amplitude / sqrt(steps) reaches the target EOM / mean."""
+    return (amplitude / target) ** 2
+
+
+class ConvergenceMonitor:
+    """Watch the EOM / mean of a chain while it is sampled, and signal when a target is reached.
+
+    The mean and the EOM are estimated online with streaming.StreamingEOM, which gives the same
+    estimate as utils.rebin_eom on the samples so far. Every check_every samples the EOM / mean is
+    recorded, and the 1/sqrt(N) tail of the recorded curve predicts the steps and seconds needed.
+
+    Example:
+        monitor = ConvergenceMonitor(target=1e-3)
+        while not monitor.should_stop():
+            monitor.extend(sample_batch())
+
+    Args:
+        target (float): Requested EOM / mean
+        num_of_bins (int): See utils.rebin_eom
+        check_every (int): Number of samples between two checkpoints
+        min_steps (int): Never stop before this number of samples, the EOM of short chains is unreliable
+        patience (int): Number of consecutive checkpoints that have to reach the target
+        tail_fraction (float): See fit_inverse_sqrt
+    """
+
+    def __init__(self, target, num_of_bins=20, check_every=1000, min_steps=None, patience=1, tail_fraction=0.5):
+        self.target = target
+        self.check_every = check_every
+        self.min_steps = 10 * num_of_bins if min_steps is None else min_steps
+        self.patience = patience
+        self.tail_fraction = tail_fraction
+        self.estimator = streaming.StreamingEOM(num_of_bins)
+        self.steps = []
+        self.times = []
+        self.rel_eoms = []
+        self._start = None
+        self._elapsed = 0.0  # elapsed of the last add, the start of the next batch in extend
+
+    def __len__(self):
+        return len(self.estimator)
+
+    def add(self, sample, elapsed=None):
+        """Add a single sample. elapsed is the sampling time in seconds so far, measured from the first sample if None."""
+        if self._start is None:
+            self._start = time.perf_counter()
+        if elapsed is not None:
+            self._elapsed = elapsed
+        self.estimator.add(sample)
+        if len(self) % self.check_every == 0:
+            self.checkpoint(elapsed)
+
+    def extend(self, samples, elapsed=None):
+        """Add the samples of a batch, elapsed is the sampling time at the end of the batch.
+        The checkpoints within the batch get times interpolated linearly between the end of the
+        previous batch and elapsed, as if the samples of the batch took equally long."""
+        if elapsed is None:
+            for sample in samples:
+                self.add(sample)
+            return
+        if not hasattr(samples, "__len__"):
+            samples = list(samples)
+        start = self._elapsed
+        for i, sample in enumerate(samples, 1):
+            self.add(sample, start + (elapsed - start) * i / len(samples))
+
+    def relative_eom(self):
+        return abs(self.estimator.relative_eom())
+
+    def checkpoint(self, elapsed=None):
+        """Record the current EOM / mean (done automatically every check_every samples)."""
+        if elapsed is None:
+            elapsed = time.perf_counter() - self._start if self._start is not None else 0.0
+        self.steps.append(len(self))
+        self.times.append(elapsed)
+        self.rel_eoms.append(self.relative_eom())
+
+    def should_stop(self):
+        """True once the last patience checkpoints all reached the target."""
+        if len(self) < self.min_steps or len(self.rel_eoms) < self.patience:
+            return False
+        return all(rel_eom <= self.target for rel_eom in self.rel_eoms[-self.patience :])
+
+    def predict(self, target=None):
+        """Predict the total steps and seconds needed to reach a target EOM / mean.
+
+        Returns:
+            tuple: (steps, seconds), nan if there are not enough checkpoints yet
+        """
+        target = self.target if target is None else target
+        amplitude = fit_inverse_sqrt(self.steps, self.rel_eoms, self.tail_fraction)
+        steps = steps_to_target(amplitude, target)
+        return steps, steps * fit_time_per_step(self.steps, self.times, self.tail_fraction)
+
+    def remaining(self, target=None):
+        """Predicted steps and seconds still needed to reach a target EOM / mean (at least 0)."""
+        steps, seconds = self.predict(target)
+        elapsed = self.times[-1] if self.times else 0.0
+        return max(steps - len(self), 0), max(seconds - elapsed, 0)
+
+
+# ========= Offline Replay of the Stored Curves ====================
+
+
+def replay(steps, times, rel_eom, target, patience=1, predict_at=0.25, tail_fraction=0.5):
+    """Replay a stored EOM / mean curve as if a ConvergenceMonitor had watched the chain,
+    with a checkpoint at every point of the curve.
+
+    Args:
+        steps (np.ndarray): Step numbers of the curve
+        times (np.ndarray): Times at the step numbers, or None
+        rel_eom (np.ndarray): EOM / mean at the step numbers
+        target (float): Requested EOM / mean
+        patience (int): See ConvergenceMonitor
+        predict_at (float): Fraction of the chain after which the steps needed are predicted,
+            to compare the prediction with the step at which the target was reached
+        tail_fraction (float): See fit_inverse_sqrt
+
+    Returns:
+        dict: stop step and time (the end of the chain if the target was not reached), total steps and time,
+            fraction of the steps and seconds saved, and the steps needed predicted at predict_at of the chain
+    """
+    steps, rel_eom, times = _valid_curve(steps, rel_eom, times)
+    reached = rel_eom <= target
+    # Index of the first point that completes a run of patience points below the target
+    run = np.convolve(reached, np.ones(patience, dtype=int), mode="full")[: len(reached)] >= patience
+    stop = int(np.argmax(run)) if np.any(run) else len(steps) - 1
+    known = steps <= predict_at * steps[-1]
+    predicted = steps_to_target(fit_inverse_sqrt(steps[known], rel_eom[known], tail_fraction), target)
+    return {
+        "reached": bool(np.any(run)),
+        "stop_step": steps[stop],
+        "stop_time": times[stop],
+        "total_steps": steps[-1],
+        "total_time": times[-1],
+        "saved_steps": 1 - steps[stop] / steps[-1],
+        "saved_time": 1 - times[stop] / times[-1],
+        "predicted_steps": predicted,
+    }
+
+
+# (dataset, filename pattern, step numbers, times, [(observable, mean, EOM)])
+curve_sources = [
+    ("eom_us", "*.npz", "step_numbers", "times", [("energy", "dyn_mean", "dyn_eom")]),
+    ("gf", "*.npz", "steps", "times", [("energy", "energy_dyn_mean", "energy_dyn_eom")]),
+    ("mag_trans_inv", "dynamic_*.npz", "steps", "times", [("mag. energy", "dyn_mean", "dyn_eom")]),
+    (
+        "eom_trans_inv_el",
+        "*.npz",
+        "step_numbers",
+        "times",
+        [("energy", "energy_mean", "energy_eom"), ("el. energy", "el_energy_mean", "el_energy_eom")],
+    ),
+]
+
+
+def replay_data(target, patience=1, predict_at=0.25, data_dir="data"):
+    """Replay all stored convergence curves in data_dir, see replay.
+
+    Returns:
+        list of tuples: (path, observable, result of replay) for every curve
+    """
+    results = []
+    for dataset, pattern, steps_key, times_key, observables in curve_sources:
+        entries = catalog.select(dataset=dataset, pattern=pattern, data_dir=data_dir)
+        keys = [steps_key, times_key] + [key for _, mean_key, eom_key in observables for key in (mean_key, eom_key)]
+        for entry, data in zip(entries, dataset_cache.load_runs(entries, keys, data_dir)):
+            for obs, mean_key, eom_key in observables:
+                if steps_key not in data or mean_key not in data or eom_key not in data:
+                    continue
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    rel_eom = data[eom_key] / data[mean_key]
+                if len(_valid_curve(data[steps_key], rel_eom)[0]) < 2:
+                    continue
+                result = replay(data[steps_key], data.get(times_key), rel_eom, target, patience, predict_at)
+                results.append((entry["path"], obs, result))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay the stored EOM / mean curves and report how much compute stopping at a target would save."
+    )
+    parser.add_argument("-t", "--target", type=float, default=0.01, help="target EOM / mean (default: 0.01)")
+    parser.add_argument(
+        "-p", "--patience", type=int, default=1, help="consecutive points that have to reach the target (default: 1)"
+    )
+    parser.add_argument(
+        "--predict-at",
+        type=float,
+        default=0.25,
+        help="fraction of the chain after which the steps needed are predicted (default: 0.25)",
+    )
+    args = parser.parse_args()
+
+    results = replay_data(args.target, args.patience, args.predict_at)
+    if not results:
+        print("No convergence curves found in data/")
+        return
+
+    print(f"{'run':<58} {'observable':<11} {'stop step':>10} {'of':>8} {'saved':>7} {'saved time':>10} {'predicted':>10}")
+    saved_steps = 0.0
+    total_steps = 0.0
+    for path, obs, result in results:
+        stop = f"{result['stop_step']:.0f}" if result["reached"] else "-"
+        saved_time = f"{100 * result['saved_time']:.0f} %" if np.isfinite(result["saved_time"]) else "-"
+        print(
+            f"{os.path.relpath(path, 'data'):<58} {obs:<11} {stop:>10} {result['total_steps']:8.0f} "
+            f"{100 * result['saved_steps']:5.0f} % {saved_time:>10} {result['predicted_steps']:10.3g}"
+        )
+        saved_steps += result["saved_steps"] * result["total_steps"]
+        total_steps += result["total_steps"]
+    reached = sum(result["reached"] for _, _, result in results)
+    print(
+        f"\n{reached} of {len(results)} curves reach EOM / mean <= {args.target:g}; "
+        f"stopping there saves {100 * saved_steps / total_steps:.1f} % of all steps"
+    )
+
+
+if __name__ == "__main__":
+    main()
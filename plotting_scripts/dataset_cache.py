@@ -0,0 +1,150 @@
+import os
+import sys
+import collections
+import numpy as np
+import store
+
+
+# ========= Process-Wide Cache of Loaded Arrays ====================
+#
+# All figures and analysis scripts load the arrays of their runs through load_runs, so a file that
+# is used by several figures of a paper_plots.py run is decompressed and parsed only once per process.
+# Arrays are keyed on the path and modification time of their archive, and the least recently used
+# arrays are evicted when the cache grows beyond its memory cap.
+
+# Memory cap in MiB, "0" switches the cache off
+env_var = "PAPER_PLOTS_DATASET_CACHE_MB"
+default_max_mb = 512
+
+_arrays = collections.OrderedDict()  # (path, mtime_ns, key or (key, index)) -> read-only np.ndarray
+_bytes = 0
+counts = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def max_bytes():
+    value = os.environ.get(env_var, "")
+    try:
+        return int(float(value) * 2**20) if value else default_max_mb * 2**20
+    except ValueError:
+        print(f"Invalid {env_var}={value}, using {default_max_mb} MiB", file=sys.stderr)
+        return default_max_mb * 2**20
+
+
+def _remember(cache_key, array):
+    """Put an array in the cache, evicting the least recently used ones."""
+    global _bytes
+    limit = max_bytes()
+    if array.nbytes > limit:
+        return
+    _arrays[cache_key] = array
+    _bytes += array.nbytes
+    while _bytes > limit:
+        _, evicted = _arrays.popitem(last=False)
+        _bytes -= evicted.nbytes
+        counts["evictions"] += 1
+
+
+def clear():
+    """Forget all cached arrays."""
+    global _bytes
+    _arrays.clear()
+    _bytes = 0
+
+
+def cached_bytes():
+    return _bytes
+
+
+def _basic_index(index):
+    """Index of a (name, index) read, see load_runs."""
+    return tuple(slice(*item) if isinstance(item, tuple) else item for item in index)
+
+
+def _read(data, key):
+    """Read an array, or only the slice of a (name, index) read, which is copied so that the cache
+    does not keep the rest of the array alive."""
+    if isinstance(key, str):
+        return np.asarray(data[key])
+    name, index = key
+    array = np.asarray(data[name][_basic_index(index)])
+    return array if array.base is None else array.copy()
+
+
+def _name(key):
+    return key if isinstance(key, str) else key[0]
+
+
+def _read_runs(entries, keys, data_dir):
+    """Read arrays of the entries, keys[i] are the keys to read of entries[i]. The archives are
+    closed before this returns, also if reading fails.
+
+    Returns:
+        list: dict key -> read-only array of every entry, None for a run that cannot be read
+            (store.open_runs skips those)
+    """
+
+    def read(data, entry_keys):
+        arrays = {}
+        for key in entry_keys:
+            if _name(key) in data:
+                arrays[key] = _read(data, key)
+                arrays[key].flags.writeable = False
+        return arrays
+
+    with store.open_runs(entries, data_dir) as data_list:
+        if len(data_list) == len(entries):
+            return [read(data, entry_keys) for data, entry_keys in zip(data_list, keys)]
+    arrays = []
+    for entry, entry_keys in zip(entries, keys):
+        with store.open_runs([entry], data_dir) as data_list:
+            arrays.append(read(data_list[0], entry_keys) if data_list else None)
+    return arrays
+
+
+def load_runs(entries, keys, data_dir="data"):
+    """Load arrays of catalog entries (see catalog.select), from the cache if they were loaded before.
+    The runs that miss an array are opened together, so runs in a dataset store are read at once.
+    The returned arrays are shared with the cache and therefore read-only; copy them to modify them.
+
+    A key (name, index) loads only a basic slice of an array, with index a tuple of integers and
+    (start, stop, step) tuples for the slices, e.g. ("autocorr", ((None, 50, None),)) for autocorr[:50].
+    Leading slices of compressed arrays are read without decompressing the rest (see datasets.LazyArray),
+    and only the slice is cached.
+
+    Args:
+        entries (list): Catalog entries
+        keys (list): Names of the arrays (or scalar fields) to load, or (name, index) pairs
+        data_dir (str): Data directory
+
+    Returns:
+        list of dicts: For every entry, its scalar fields (from the catalog) and the requested
+            arrays that it has, under their keys
+    """
+    runs = []
+    missing = []
+    for entry in entries:
+        run = dict(entry["fields"])
+        to_read = []
+        for key in keys:
+            cache_key = (entry["path"], entry["mtime_ns"], key)
+            if key in run or key in to_read:
+                continue
+            if cache_key in _arrays:
+                _arrays.move_to_end(cache_key)
+                run[key] = _arrays[cache_key]
+                counts["hits"] += 1
+            elif _name(key) in entry["shapes"]:
+                to_read.append(key)
+        if to_read:
+            missing.append((run, entry, to_read))
+        runs.append(run)
+
+    if missing:
+        arrays_list = _read_runs([entry for _, entry, _ in missing], [to_read for _, _, to_read in missing], data_dir)
+        for (run, entry, _), arrays in zip(missing, arrays_list):
+            for key, array in (arrays or {}).items():
+                run[key] = array
+                counts["misses"] += 1
+                if max_bytes() > 0:
+                    _remember((entry["path"], entry["mtime_ns"], key), array)
+    return runs
@@ -0,0 +1,240 @@
+import sys
+import struct
+import zipfile
+import tempfile
+import contextlib
+import numpy as np
+
+
+# ========= Lazy Access to the .npz Archives ====================
+
+
+class LazyArray:
+    """Array member of an .npz archive that is only read when it is indexed.
+
+    Uncompressed members are memory-mapped, so any slice only reads the pages it needs.
+    For compressed members, a leading slice along the first axis (e.g. autocorr[:limit])
+    only decompresses the needed prefix, and other basic slices (e.g. grad[:, :2, 3:5]) are
+    decompressed in chunks of rows, so only the selected elements are kept in memory.
+    Any other index reads the full array.
+    """
+
+    stream_chunk_bytes = 2**20
+
+    def __init__(self, dataset, member):
+        self._dataset = dataset
+        self._member = member
+        self._memmap = None
+        self._spill_file = None
+        with self._open() as stream:
+            version = np.lib.format.read_magic(stream)
+            if version == (1, 0):
+                header = np.lib.format.read_array_header_1_0(stream)
+            else:
+                header = np.lib.format.read_array_header_2_0(stream)
+            self.shape, self._fortran_order, self.dtype = header
+            self._header_size = stream.tell()
+
+    def _open(self):
+        return self._dataset._zip.open(self._member)
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def _mapped(self):
+        """Memory map of the member, or None if it is compressed."""
+        info = self._dataset._zip.getinfo(self._member)
+        if info.compress_type != zipfile.ZIP_STORED or self.dtype.hasobject:
+            return None
+        if self._memmap is None:
+            with open(self._dataset.path, "rb") as f:
+                f.seek(info.header_offset)
+                local_header = f.read(30)
+            filename_length, extra_length = struct.unpack("<HH", local_header[26:30])
+            offset = info.header_offset + 30 + filename_length + extra_length + self._header_size
+            self._memmap = np.memmap(
+                self._dataset.path,
+                dtype=self.dtype,
+                mode="r",
+                offset=offset,
+                shape=self.shape,
+                order="F" if self._fortran_order else "C",
+            )
+        return self._memmap
+
+    def _read_prefix(self, stop):
+        """Read the first stop elements along the first axis of a compressed member."""
+        count = min(stop, self.shape[0]) * int(np.prod(self.shape[1:]))
+        with self._open() as stream:
+            stream.seek(self._header_size)
+            buffer = stream.read(count * self.dtype.itemsize)
+        return np.frombuffer(buffer, dtype=self.dtype).reshape((-1,) + self.shape[1:]).copy()
+
+    def _read_streamed(self, first, rest):
+        """Read the rows selected by the slice first of a compressed member chunk by chunk,
+        and apply the basic index rest to the remaining axes of every chunk."""
+        start, stop, step = first.indices(self.shape[0])
+        row_size = int(np.prod(self.shape[1:])) * self.dtype.itemsize
+        rows_per_chunk = max(1, self.stream_chunk_bytes // max(row_size, 1))
+        pieces = []
+        with self._open() as stream:
+            stream.seek(self._header_size + start * row_size)
+            row = start
+            while row < stop:
+                n_rows = min(rows_per_chunk, stop - row)
+                buffer = stream.read(n_rows * row_size)
+                chunk = np.frombuffer(buffer, dtype=self.dtype).reshape((-1,) + self.shape[1:])
+                # Rows of this chunk that are selected by the step of the slice
+                offset = (-(row - start)) % step
+                pieces.append(chunk[(slice(offset, None, step),) + rest].copy())
+                row += n_rows
+        if not pieces:
+            return np.empty((0,) + self.shape[1:], dtype=self.dtype)[(slice(None),) + rest]
+        return np.concatenate(pieces)
+
+    def memmap(self):
+        """Memory map of the member, for repeated slicing without keeping the array in memory.
+        Compressed members are first decompressed chunk by chunk into an anonymous temporary file,
+        which is deleted when the dataset is closed."""
+        mapped = self._mapped()
+        if mapped is not None:
+            return mapped
+        if self._memmap is None:
+            self._spill_file = tempfile.TemporaryFile()
+            with self._open() as stream:
+                stream.seek(self._header_size)
+                for chunk in iter(lambda: stream.read(self.stream_chunk_bytes), b""):
+                    self._spill_file.write(chunk)
+            self._spill_file.flush()
+            self._memmap = np.memmap(
+                self._spill_file,
+                dtype=self.dtype,
+                mode="r",
+                shape=self.shape,
+                order="F" if self._fortran_order else "C",
+            )
+        return self._memmap
+
+    def read(self):
+        """Read the full array."""
+        with self._open() as stream:
+            return np.lib.format.read_array(stream)
+
+    def __getitem__(self, key):
+        mapped = self._mapped()
+        if mapped is not None:
+            return np.array(mapped[key])
+        first = key[0] if isinstance(key, tuple) and key else key
+        rest = key[1:] if isinstance(key, tuple) else ()
+        if (
+            isinstance(first, slice)
+            and first.stop is not None
+            and first.stop >= 0
+            and (first.start or 0) >= 0
+            and (first.step or 1) > 0
+            and self.ndim > 0
+            and (self.ndim == 1 or not self._fortran_order)
+            and not self.dtype.hasobject
+        ):
+            prefix = self._read_prefix(first.stop)
+            return prefix[(slice(first.start, None, first.step),) + rest]
+        if (
+            isinstance(first, slice)
+            and (first.step or 1) > 0
+            and self.ndim > 1
+            and not self._fortran_order
+            and not self.dtype.hasobject
+            and all(isinstance(index, (slice, int, np.integer)) for index in rest)
+        ):
+            return self._read_streamed(first, rest)
+        return self.read()[key]
+
+    def __array__(self, dtype=None, copy=None):
+        arr = self.read()
+        if dtype is not None:
+            arr = arr.astype(dtype)
+        return arr
+
+    def close(self):
+        self._memmap = None
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+
+class Dataset:
+    """Read-only access to an .npz archive.
+
+    Scalar (0-d) members are returned as arrays, like np.load. All other members are returned
+    as LazyArray, which is read only when indexed (e.g. data["autocorr"][:limit]) or converted
+    with np.asarray. The file handle is closed by close(), or at the end of a with block.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        self._members = {
+            name[: -len(".npy")]: name for name in self._zip.namelist() if name.endswith(".npy")
+        }
+        self._arrays = {}
+
+    @property
+    def files(self):
+        return list(self._members)
+
+    def keys(self):
+        return self._members.keys()
+
+    def __contains__(self, key):
+        return key in self._members
+
+    def __getitem__(self, key):
+        if key not in self._arrays:
+            array = LazyArray(self, self._members[key])
+            if array.ndim == 0:
+                array = array.read()
+            self._arrays[key] = array
+        return self._arrays[key]
+
+    def close(self):
+        for array in self._arrays.values():
+            if isinstance(array, LazyArray):
+                array.close()
+        self._arrays = {}
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_dataset(path):
+    return Dataset(path)
+
+
+@contextlib.contextmanager
+def open_datasets(paths):
+    """Open several .npz archives at once, and close all of them at the end of the with block.
+    Archives that cannot be read are skipped with an error message.
+
+    Yields:
+        list: Dataset of every readable archive
+    """
+    with contextlib.ExitStack() as stack:
+        data_list = []
+        for path in paths:
+            try:
+                data_list.append(stack.enter_context(Dataset(path)))
+            except Exception as e:
+                print(f"Error loading {path}: {e}", file=sys.stderr)
+        yield data_list
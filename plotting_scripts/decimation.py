@@ -0,0 +1,50 @@
+import numpy as np
+
+
+# ========= Decimation of Long Curves for Plotting ====================
+
+
+def decimate_loglog(x, y, max_points=2000):
+    """Downsample a curve that is drawn on a logarithmic x axis to at most about max_points points.
+
+    The positive x range is split into max_points / 4 logarithmically spaced buckets. From every bucket
+    the first and last point and the points with the smallest and largest y are kept, so the
+    visual extrema survive and the bounded number of points keeps the rendering time independent
+    of the length of the chain. Curves with at most max_points points are returned unchanged.
+
+    Args:
+        x (np.ndarray): x values, e.g. step numbers or times, or None for the index of y (as drawn by plt.plot(y))
+        y (np.ndarray): y values, e.g. EOM / mean
+        max_points (int): Target number of points
+
+    Returns:
+        tuple: (decimated x, decimated y), in the original order
+    """
+    y = np.asarray(y)
+    x = np.arange(len(y)) if x is None else np.asarray(x)
+    if len(x) <= max_points:
+        return x, y
+    n_buckets = max(max_points // 4, 1)
+
+    # Points with x <= 0 are not drawn on a log axis, they are kept as they are
+    keep = [np.flatnonzero(~(x > 0))]
+    idx = np.flatnonzero(x > 0)
+    if len(idx) == 0:
+        return x, y
+    log_x = np.log(x[idx])
+    edges = np.linspace(log_x.min(), log_x.max(), n_buckets + 1)
+    bucket = np.clip(np.searchsorted(edges, log_x, side="right") - 1, 0, n_buckets - 1)
+
+    # smallest and largest y per bucket
+    order = np.lexsort((y[idx], bucket))
+    new_bucket = bucket[order][1:] != bucket[order][:-1]
+    keep.append(idx[order[np.r_[True, new_bucket]]])
+    keep.append(idx[order[np.r_[new_bucket, True]]])
+
+    # first and last point per bucket
+    new_bucket = bucket[1:] != bucket[:-1]
+    keep.append(idx[np.r_[True, new_bucket]])
+    keep.append(idx[np.r_[new_bucket, True]])
+
+    keep = np.unique(np.concatenate(keep))
+    return x[keep], y[keep]
@@ -0,0 +1,175 @@
+import os
+import re
+import sys
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import catalog
+import dataset_cache
+import utils
+import convergence
+
+
+# ========= Cost-Normalized Efficiency of the Sampling Configurations ====================
+#
+# For every run the cost to reach a target EOM / mean is predicted from the 1/sqrt(N) tail of its
+# dyn_eom curve (see convergence.fit_inverse_sqrt), in steps and, where the run recorded valid times,
+# in seconds. The integrated autocorrelation time needs an autocorrelation function, which is stored
+# for the gf runs and, for L = 6, in auto_correlation_us; elsewhere it is reported as nan.
+
+
+def run_efficiency(steps, times, rel_eom, autocorr=None, target=0.01, tail_fraction=0.5):
+    """Efficiency of a single run.
+
+    Args:
+        steps (np.ndarray): Step numbers of the dyn_eom curve
+        times (np.ndarray): Times at the step numbers, or None
+        rel_eom (np.ndarray): EOM / mean at the step numbers
+        autocorr (np.ndarray): Autocorrelation function of the observable (lags in steps), or None
+        target (float): Target EOM / mean
+        tail_fraction (float): See convergence.fit_inverse_sqrt
+
+    Returns:
+        dict: tau_int, seconds_per_step, effective samples per second, and the steps and seconds
+            needed to reach the target (nan where they cannot be determined)
+    """
+    steps, rel_eom, times = convergence._valid_curve(steps, rel_eom, times)
+    seconds_per_step = convergence.fit_time_per_step(steps, times, tail_fraction)
+    steps_needed = convergence.steps_to_target(convergence.fit_inverse_sqrt(steps, rel_eom, tail_fraction), target)
+    tau_int = np.nan
+    if autocorr is not None:
+        tau_int = float(utils.autocorr_tau_int(autocorr, int(steps[-1]))[0])
+    return {
+        "tau_int": tau_int,
+        "seconds_per_step": seconds_per_step,
+        "effective_per_second": 1 / (2 * tau_int * seconds_per_step),
+        "steps_to_target": steps_needed,
+        "seconds_to_target": steps_needed * seconds_per_step,
+    }
+
+
+def _gf_runs():
+    """(group, choice, steps, times, EOM / mean, autocorrelation) of the gauge fixing runs, grouped by (L, g)."""
+    entries = catalog.select(dataset="gf")
+    keys = ["steps", "times", "energy_dyn_mean", "energy_dyn_eom", "energy_autocorr"]
+    for data in dataset_cache.load_runs(entries, keys):
+        rel_eom = data["energy_dyn_eom"] / data["energy_dyn_mean"]
+        group = f"L={int(data['L'])} g={float(data['g']):g}"
+        yield group, f"gf {data['c']}", data["steps"], data["times"], rel_eom, data["energy_autocorr"]
+
+
+def _us_runs():
+    """Runs with different update sizes n, grouped by L. The autocorrelation is taken from
+    auto_correlation_us where it was measured for the same L and n."""
+    autocorrs = {}
+    entries = catalog.select(dataset="auto_correlation_us")
+    for entry, data in zip(entries, dataset_cache.load_runs(entries, ["autocorr"])):
+        L = re.search(r"L_(\d+)_", os.path.basename(entry["path"]))
+        if L and "autocorr" in data:
+            autocorrs[(int(L.group(1)), int(data["n"]))] = data["autocorr"]
+
+    entries = catalog.select(dataset="eom_us")
+    for data in dataset_cache.load_runs(entries, ["step_numbers", "times", "dyn_mean", "dyn_eom"]):
+        L, n = int(data["L"]), int(data["n"])
+        rel_eom = data["dyn_eom"] / data["dyn_mean"]
+        yield f"L={L}", f"n={n}", data["step_numbers"], data["times"], rel_eom, autocorrs.get((L, n))
+
+
+def _mag_runs():
+    """Runs of the translation invariant magnetic ansatz, updating all or single parameters, grouped by (ansatz, g)."""
+    entries = catalog.select(dataset="mag_trans_inv", pattern="dynamic_*.npz")
+    for entry, data in zip(entries, dataset_cache.load_runs(entries, ["steps", "times", "dyn_mean", "dyn_eom"])):
+        ansatz = re.search(r"ansatz_([\d.]+)_", os.path.basename(entry["path"])).group(1)
+        rel_eom = data["dyn_eom"] / data["dyn_mean"]
+        group = f"ansatz {ansatz} g={float(data['g']):g}"
+        yield group, f"{data['mode']}", data["steps"], data["times"], rel_eom, None
+
+
+# dataset -> generator of its runs
+run_sources = {"eom_us": _us_runs, "gf": _gf_runs, "mag_trans_inv": _mag_runs}
+
+
+def compute_results(target=0.01, sources=None):
+    """Efficiency of every run, ranked within its group.
+    Runs are ranked by the seconds needed to reach the target, or by the steps if their times are not valid.
+    Runs for which neither is known are ranked last.
+
+    Args:
+        target (float): Target EOM / mean
+        sources (list): Datasets to include, all of run_sources if None
+
+    Returns:
+        dict: (dataset, group) -> list of (choice, result of run_efficiency), best first
+    """
+    results = {}
+    for dataset in sources or run_sources:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for group, choice, steps, times, rel_eom, autocorr in run_sources[dataset]():
+                result = run_efficiency(steps, times, rel_eom, autocorr, target)
+                results.setdefault((dataset, group), []).append((choice, result))
+    for ranked in results.values():
+        ranked.sort(key=lambda item: _cost(item[1]))
+    return results
+
+
+def _cost(result):
+    """Seconds to reach the target, or steps if the times are not valid, inf if neither is known."""
+    if np.isfinite(result["seconds_to_target"]):
+        return result["seconds_to_target"]
+    if np.isfinite(result["steps_to_target"]):
+        return result["steps_to_target"]
+    return np.inf
+
+
+def recommendations(results):
+    """Best choice of every group, see compute_results. Choices without a finite cost are not
+    recommended, and groups without any are left out.
+
+    Returns:
+        dict: (dataset, group) -> (choice, speedup over the worst choice of the group with a finite cost)
+    """
+    best = {}
+    for key, ranked in results.items():
+        costs = [(choice, _cost(result)) for choice, result in ranked if np.isfinite(_cost(result))]
+        if costs:
+            best[key] = (costs[0][0], costs[-1][1] / costs[0][1])
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rank the update sizes and gauge fixing trees by the compute needed to reach a target EOM / mean."
+    )
+    parser.add_argument("-t", "--target", type=float, default=0.01, help="target EOM / mean (default: 0.01)")
+    parser.add_argument(
+        "datasets", nargs="*", default=list(run_sources), help=f"datasets to rank (default: {' '.join(run_sources)})"
+    )
+    args = parser.parse_args()
+
+    unknown = [name for name in args.datasets if name not in run_sources]
+    if unknown:
+        print(f"Unknown datasets: {', '.join(unknown)}. Available: {', '.join(run_sources)}")
+        sys.exit(2)
+
+    results = compute_results(args.target, args.datasets)
+    best = recommendations(results)
+    for (dataset, group), ranked in results.items():
+        print(f"\n{dataset} {group}")
+        print(f"  {'choice':<8} {'tau_int':>8} {'s / step':>10} {'eff. / s':>10} {'steps to target':>16} {'time to target':>15}")
+        for choice, result in ranked:
+            seconds = result["seconds_to_target"]
+            print(
+                f"  {choice:<8} {result['tau_int']:8.2f} {result['seconds_per_step']:10.4g} "
+                f"{result['effective_per_second']:10.4g} {result['steps_to_target']:16.4g} "
+                + (f"{seconds / 3600:13.3g} h" if np.isfinite(seconds) else f"{'-':>15}")
+            )
+
+    print(f"\nRecommended choice for EOM / mean <= {args.target:g}")
+    for (dataset, group), (choice, speedup) in best.items():
+        print(f"  {dataset:<14} {group:<22} {choice:<8} ({speedup:.2f}x cheaper than the worst)")
+
+
+if __name__ == "__main__":
+    main()
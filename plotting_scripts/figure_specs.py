@@ -0,0 +1,330 @@
+# ========= Declarative Figure Specifications ====================
+#
+# Every figure is a dict, built by figures.build. A figure has
+#   "output": path of the figure
+#   "style": module in plotting_formats
+#   "subplots": keyword arguments of plt.subplots (default: a single axis)
+#   "panels": list of panels, see below
+#   "tight_layout", "subplots_adjust": keyword arguments, the call is skipped if the key is missing
+#   "legend": figure legend with the handles of the panel at "panel" (row, column), "ncol" defaults to one
+#       column per label, the other keys are passed to fig.legend
+#   "savefig": keyword arguments of plt.savefig
+#
+# A panel draws one curve per selected run, or with "scalar" one curve per group of runs, at
+#   "ax": (row, column) of the axis (default: (0, 0))
+#   "select": keyword arguments of catalog.select
+#   "key": scalar field that identifies a curve, used for "order", "labels" and "colors"
+#   "order": values of the key to draw, in this order (default: all, sorted)
+#   "x", "y": expressions of the arrays and scalar fields of a run, with np and abs. Without "x",
+#       y is drawn against its index. With "scalar", x and y are scalars and every point is a run
+#       Arrays indexed by constant slices, e.g. autocorr[:50], only read and cache that slice
+#   "decimate": reduce long curves with decimation.decimate_loglog
+#   "fmt": format string of plt.plot
+#   "labels", "colors": key -> label or color, "label": format of the label of keys missing in labels
+#   "axes": ax.set_<name>(value) in the given order, dict values are passed as keyword arguments
+#   "legend": keyword arguments of ax.legend, no legend if the key is missing
+
+c_order = ["F", "c", "2", "T"]  # gauge fixing types
+
+gf_colors = {
+    "F": "tab:blue", "c": "tab:orange", "2": "tab:green", "T": "tab:red",
+    "1": "tab:brown", "3": "tab:purple", "4": "tab:pink"
+}
+gf_labels = {
+    "F": "no gauge fixing", "c": "chessboard", "2": "2 fixed rows",
+    "T": "maximal tree", "1": "1 fixed row", "3": "3 fixed rows", "4": "4 fixed rows"
+}
+
+mode_colors = {"all": "tab:orange", "single": "tab:blue"}
+mode_labels = {"all": "all plaquettes", "single": "single plaquette"}
+
+eom_label = r"$\frac{\text{EOM}}{\text{mean}}$"
+top_legend = {"loc": "lower center", "bbox_to_anchor": (0.5, 1.02), "ncol": 2, "frameon": False}
+
+us_autocorr_labels = {
+    1:  r"1 link ($\frac{1}{72}N_{\text{links}}$)",
+    9:  r"9 links ($\frac{1}{8}N_{\text{links}}$)",
+    18: r"18 links ($\frac{1}{4}N_{\text{links}}$)",
+    36: r"36 links ($\frac{1}{2}N_{\text{links}}$)",
+    54: r"54 links ($\frac{3}{4}N_{\text{links}}$)",
+    63: r"63 links ($\frac{7}{8}N_{\text{links}}$)",
+}
+
+el_labels = {
+    1: r"1 link ($\frac{1}{32}N_{\text{links}}$)",
+    4: r"4 links ($\frac{1}{8}N_{\text{links}}$)",
+    8: r"8 links ($\frac{1}{4}N_{\text{links}}$)",
+    16: r"16 links ($\frac{1}{2}N_{\text{links}}$)",
+    26: r"16 links ($\frac{1}{2}N_{\text{links}}$)",
+}
+
+n_labels_2 = {
+    1: (r"single link", "tab:blue"),
+    2: (r"$\frac{1}{4}N_{\text{links}}$", "tab:green"),
+    4: (r"$\frac{1}{2}N_{\text{links}}$", "tab:red"),
+    6: (r"$\frac{3}{4}N_{\text{links}}$", "tab:purple"),
+    7: (r"$\frac{7}{8}N_{\text{links}}$", "tab:brown"),
+    8: (r"$N_{\text{links}}$", "tab:gray"),
+}
+n_labels_4 = {
+    1: (r"single link", "tab:blue"),
+    4: (r"$\frac{1}{8}N_{\text{links}}$", "tab:orange"),
+    8: (r"$\frac{1}{4}N_{\text{links}}$", "tab:green"),
+    16: (r"$\frac{1}{2}N_{\text{links}}$", "tab:red"),
+    24: (r"$\frac{3}{4}N_{\text{links}}$", "tab:purple"),
+    28: (r"$\frac{7}{8}N_{\text{links}}$", "tab:brown"),
+    32: (r"$N_{\text{links}}$", "tab:gray"),
+}
+n_labels_6 = {
+    1: (r"single link", "tab:blue"),
+    9: (r"$\frac{1}{8}N_{\text{links}}$", "tab:orange"),
+    18: (r"$\frac{1}{4}N_{\text{links}}$", "tab:green"),
+    36: (r"$\frac{1}{2}N_{\text{links}}$", "tab:red"),
+    54: (r"$\frac{3}{4}N_{\text{links}}$", "tab:purple"),
+    63: (r"$\frac{7}{8}N_{\text{links}}$", "tab:brown"),
+}
+
+# (L_size, labels_dict, unwanted_ns)
+us_columns = [
+    (2, n_labels_2, [7, 8]),   # Col 0: L=2
+    (4, n_labels_4, [28, 32]), # Col 1: L=4
+    (6, n_labels_6, [63]),     # Col 2: L=6
+]
+
+
+def eom_steps_and_times(select, key, obs_key, ylabel, labels=None, label=None, order=None, steps="step_numbers"):
+    """Panels of EOM / mean against step number (top) and time (bottom) of a two row figure.
+    The first point of the curves is skipped (often 0 error)."""
+    y = f"{obs_key}_eom[1:] / {obs_key}_mean[1:]"
+    common = {"select": select, "key": key, "order": order, "y": y, "decimate": True, "labels": labels, "label": label}
+    return [
+        dict(
+            common,
+            ax=(0, 0),
+            x=f"{steps}[1:]",
+            axes={"ylabel": ylabel, "xlabel": "Step number", "yscale": "log", "xscale": "log"},
+            legend=top_legend,
+        ),
+        dict(
+            common,
+            ax=(1, 0),
+            x="times[1:]",
+            axes={"ylabel": ylabel, "yscale": "log", "xscale": "log", "xlabel": "Time [sec]"},
+        ),
+    ]
+
+
+def eom_us_panels():
+    """Panels of EOM / mean of the energy against step number (top row) and time (bottom row) for every L (column)."""
+    panels = []
+    for col, (L, n_labels, unwanted_ns) in enumerate(us_columns):
+        N_links = 2 * (L**2)
+        common = {
+            "select": {"dataset": "eom_us", "L": L},
+            "key": "n",
+            "order": [n for n in n_labels if n not in unwanted_ns],
+            "y": "dyn_eom[1:] / dyn_mean[1:]",
+            "decimate": True,
+            "labels": {n: label for n, (label, _) in n_labels.items()},
+            "colors": {n: color for n, (_, color) in n_labels.items()},
+        }
+        ylabel = {"ylabel": eom_label + " of energy"} if col == 0 else {}
+        panels.append(
+            dict(
+                common,
+                ax=(0, col),
+                x="step_numbers[1:]",
+                axes={
+                    "title": r"$L=$" + f"{L} " + r"($N_{\text{links}}=$" + f"{N_links})",
+                    "xlabel": "Step number",
+                    "yscale": "log",
+                    "xscale": "log",
+                    **ylabel,
+                },
+            )
+        )
+        panels.append(
+            dict(
+                common,
+                ax=(1, col),
+                x="times[1:]",
+                axes={"xlabel": "Time [sec]", "yscale": "log", "xscale": "log", **ylabel},
+            )
+        )
+    return panels
+
+
+figures = {
+    # Autocorrelation of the energy as a function of step number for different gauge fixing trees
+    "auto_correlation_gf": {
+        "output": "figures/auto_correlation_gf.pdf",
+        "style": "plot_format",
+        "panels": [
+            {
+                "select": {"dataset": "gf", "L": 6, "g": 0.7857, "c": c_order},
+                "key": "c",
+                "order": c_order,
+                "y": "abs(energy_autocorr[:145])",
+                "labels": gf_labels,
+                "colors": gf_colors,
+                "axes": {
+                    "yscale": "log",
+                    "ylabel": r"Autocorrelation of energy",
+                    "xlabel": "Step number",
+                    "ylim": {"bottom": 1e-3},
+                },
+                "legend": {},
+            }
+        ],
+    },
+    # Autocorrelation of the energy as a function of step number for different number of updated links per step
+    "auto_correlation_us": {
+        "output": "figures/auto_correlation_us.pdf",
+        "style": "plot_format",
+        "panels": [
+            {
+                "select": {"dataset": "auto_correlation_us", "pattern": "L_6_update_size_*.npz"},
+                "key": "n",
+                "y": "abs(autocorr[:50])",
+                "labels": us_autocorr_labels,
+                "label": "update_size {}",
+                "axes": {
+                    "ylabel": "Autocorrelation of energy",
+                    "xlabel": "Step number",
+                    "ylim": {"bottom": 1e-4},
+                    "xlim": {"right": 50},
+                    "yscale": "log",
+                },
+                "legend": {"loc": "upper right"},
+            }
+        ],
+        "savefig": {"dpi": 300, "bbox_inches": "tight"},
+    },
+    # Relative error on the mean of the energy as a function of the coupling for different gauge fixing trees
+    "eom_couplings_gf": {
+        "output": "figures/eom_couplings_gf.pdf",
+        "style": "plot_format",
+        "panels": [
+            {
+                "select": {"dataset": "gf", "c": c_order},
+                "key": "c",
+                "order": c_order,
+                "scalar": True,
+                "x": "g",
+                "y": "energy_scalar_eom / energy_scalar_mean",
+                "fmt": "o-",
+                "labels": gf_labels,
+                "colors": gf_colors,
+                "legend": top_legend,
+                "axes": {"xlabel": r"$\lambda$", "ylabel": eom_label + " of energy"},
+            }
+        ],
+        "tight_layout": {},
+        "subplots_adjust": {"top": 0.82},
+    },
+    # Error on the mean over mean of the energy, comparing cases where the magnetic energy
+    # is averaged over all plaquettes versus a single plaquette (scalar data from Ansatz 0.5)
+    "eom_couplings_TI_energy": {
+        "output": "figures/eom_couplings_TI_energy.pdf",
+        "style": "plot_format",
+        "panels": [
+            {
+                "select": {"dataset": "mag_trans_inv", "pattern": "scalar_mag_ansatz_0.5*.npz"},
+                "key": "mode",
+                "order": ["single", "all"],
+                "scalar": True,
+                "x": "g",
+                "y": "eom / mean",
+                "fmt": "o-",
+                "labels": mode_labels,
+                "colors": mode_colors,
+                "legend": top_legend,
+                "axes": {"xlabel": r"$\lambda$", "ylabel": eom_label + " of energy"},
+            }
+        ],
+        "tight_layout": {},
+        "subplots_adjust": {"top": 0.82},
+    },
+    # Relative error on the mean of the energy as a function of step number for different gauge fixing trees
+    "eom_gf": {
+        "output": "figures/eom_gf.pdf",
+        "style": "plot_format",
+        "panels": [
+            {
+                "select": {"dataset": "gf", "L": 6, "g": 0.7857, "c": c_order},
+                "key": "c",
+                "order": c_order,
+                "x": "steps[1:]",
+                "y": "energy_dyn_eom[1:] / energy_dyn_mean[1:]",
+                "decimate": True,
+                "labels": gf_labels,
+                "colors": gf_colors,
+                "axes": {
+                    "ylabel": eom_label + " of energy",
+                    "xlabel": "Step number",
+                    "yscale": "log",
+                    "xscale": "log",
+                },
+                "legend": {},
+            }
+        ],
+        "tight_layout": {},
+    },
+    # Error on the mean over mean of magnetic energy as a function of step number and computation time
+    # when sampling a single plaquette vs. when sampling all plaquettes (dynamic data from Ansatz 1.0)
+    "eom_mag_energy_trans_inv": {
+        "output": "figures/eom_mag_energy_trans_inv.pdf",
+        "style": "plot_format_two_rows",
+        "subplots": {"nrows": 2, "ncols": 1},
+        "panels": eom_steps_and_times(
+            {"dataset": "mag_trans_inv", "pattern": "dynamic_mag_ansatz_1.0*.npz", "g": 0.7857},
+            key="mode",
+            obs_key="dyn",
+            ylabel=eom_label + " of mag. energy",
+            labels=mode_labels,
+            order=["single", "all"],
+            steps="steps",
+        ),
+        "tight_layout": {},
+    },
+    # Error on the mean over mean of the energy and of the electric energy as a function of step number
+    # and time for various numbers of links over which the electric energy is averaged
+    "eom_el_energy_trans_inv_total_energy": {
+        "output": "figures/eom_el_energy_trans_inv_total_energy.pdf",
+        "style": "plot_format_two_rows",
+        "subplots": {"nrows": 2, "ncols": 1},
+        "panels": eom_steps_and_times(
+            {"dataset": "eom_trans_inv_el", "pattern": "L_4_el_links_*.npz"},
+            key="n",
+            obs_key="energy",
+            ylabel=eom_label + " of energy",
+            labels=el_labels,
+            label="{} links",
+        ),
+        "savefig": {"dpi": 300, "bbox_inches": "tight"},
+    },
+    "eom_el_energy_trans_inv": {
+        "output": "figures/eom_el_energy_trans_inv.pdf",
+        "style": "plot_format_two_rows",
+        "subplots": {"nrows": 2, "ncols": 1},
+        "panels": eom_steps_and_times(
+            {"dataset": "eom_trans_inv_el", "pattern": "L_4_el_links_*.npz"},
+            key="n",
+            obs_key="el_energy",
+            ylabel=eom_label + " of electric energy",
+            labels=el_labels,
+            label="{} links",
+        ),
+        "savefig": {"dpi": 300, "bbox_inches": "tight"},
+    },
+    # Relative error on the mean of the energy as a function of step number and time
+    # for different number of updated links per step and various lattice sizes
+    "eom_us": {
+        "output": "figures/eom_us.pdf",
+        "style": "plot_format_2_columns",
+        "subplots": {"nrows": 2, "ncols": 3, "figsize": (6.85, 4.5), "sharey": "row"},
+        "panels": eom_us_panels(),
+        "tight_layout": {"rect": [0, 0, 1, 0.93]},
+        "legend": {"panel": (1, 1), "loc": "upper center", "bbox_to_anchor": (0.5, 0.99), "frameon": False},
+    },
+}
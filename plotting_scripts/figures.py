@@ -0,0 +1,243 @@
+import os
+import ast
+import sys
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import catalog
+import dataset_cache
+import plotting
+import profiling
+import figure_specs
+from decimation import decimate_loglog
+
+
+# ========= Figure Engine for the Declarative Specifications ====================
+#
+# Builds the figures of figure_specs.figures. The arrays are loaded through dataset_cache, so
+# every file is read once per process and shared by all figures built afterwards, e.g. data/gf
+# is not read again for every figure that shows it.
+
+expression_globals = {"__builtins__": {}, "np": np, "abs": np.abs}
+
+
+def _constant_index(node):
+    """Index of a subscript as a tuple of integers and (start, stop, step) tuples,
+    see dataset_cache.load_runs, or None if it is not made of constant slices and integers."""
+    index = []
+    for item in node.elts if isinstance(node, ast.Tuple) else [node]:
+        try:
+            if isinstance(item, ast.Slice):
+                bounds = tuple(None if b is None else ast.literal_eval(b) for b in (item.lower, item.upper, item.step))
+                if not all(b is None or isinstance(b, int) for b in bounds):
+                    return None
+                index.append(bounds)
+            elif isinstance(ast.literal_eval(item), int):
+                index.append(ast.literal_eval(item))
+            else:
+                return None
+        except ValueError:
+            return None
+    return tuple(index)
+
+
+class Expression(ast.NodeTransformer):
+    """An expression of the scalar fields and arrays of a run, with np and abs.
+    Arrays indexed by constant slices, e.g. autocorr[:50], are loaded as slices (see
+    dataset_cache.load_runs), so only the needed part of them is read and cached.
+
+    Attributes:
+        keys (list): Names and (name, index) slices to load with dataset_cache.load_runs
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self._names = []
+        self._slices = {}  # name in the compiled expression -> (name, index)
+        tree = self.visit(ast.parse(source, mode="eval"))
+        self._code = compile(ast.fix_missing_locations(tree), "<spec>", "eval")
+        self.keys = self._names + list(self._slices.values())
+
+    def visit_Subscript(self, node):
+        index = _constant_index(node.slice)
+        if isinstance(node.value, ast.Name) and node.value.id not in expression_globals and index is not None:
+            alias = f"_slice_{len(self._slices)}"
+            self._slices[alias] = (node.value.id, index)
+            return ast.copy_location(ast.Name(id=alias, ctx=ast.Load()), node)
+        return self.generic_visit(node)
+
+    def visit_Name(self, node):
+        if node.id not in expression_globals and node.id not in self._names:
+            self._names.append(node.id)
+        return node
+
+    def __call__(self, run):
+        """Evaluate the expression on a run loaded with the keys, see dataset_cache.load_runs."""
+        namespace = {name: run[name] for name in self._names if name in run}
+        for alias, key in self._slices.items():
+            if key not in run:
+                raise NameError(f"name '{key[0]}' is not defined")
+            namespace[alias] = run[key]
+        return eval(self._code, expression_globals, namespace)
+
+
+def panel_entries(panel):
+    """Selected runs of a panel, grouped by the value of its key, in drawing order.
+
+    Returns:
+        list of tuples: (key value, list of catalog entries)
+    """
+    entries = catalog.select(**panel["select"])
+    key = panel["key"]
+    groups = {}
+    for entry in entries:
+        if key in entry["fields"]:
+            groups.setdefault(entry["fields"][key], []).append(entry)
+    order = panel.get("order")
+    if order is None:
+        order = sorted(groups)
+    return [(value, groups[value]) for value in order if value in groups]
+
+
+@profiling.stage("compute")
+def compute_panel(panel):
+    """Curves of a panel, without plotting.
+
+    Returns:
+        list of tuples: (key value, x or None, y) in drawing order
+    """
+    groups = panel_entries(panel)
+    x = Expression(panel["x"]) if panel.get("x") else None
+    y = Expression(panel["y"])
+    keys = y.keys if x is None else x.keys + [key for key in y.keys if key not in x.keys]
+    runs = iter(dataset_cache.load_runs([entry for _, group in groups for entry in group], keys))
+    groups = [(value, [next(runs) for _ in group]) for value, group in groups]
+
+    curves = []
+    for value, group in groups:
+        try:
+            if panel.get("scalar"):
+                points = [(float(x(run)), float(y(run))) for run in group]
+                points = sorted(point for point in points if np.isfinite(point[1]))
+                if points:
+                    curves.append((value, np.array([p[0] for p in points]), np.array([p[1] for p in points])))
+                continue
+            for run in group:
+                curve_x = x(run) if x is not None else None
+                curve_y = y(run)
+                if panel.get("decimate"):
+                    curve_x, curve_y = decimate_loglog(curve_x, curve_y)
+                curves.append((value, curve_x, curve_y))
+        except (NameError, ValueError) as e:
+            print(f"Error evaluating {panel['key']}={value} of {panel['select']}: {e}", file=sys.stderr)
+    return curves
+
+
+def compute_results(name):
+    """Curves of every panel of a figure, without plotting."""
+    return [compute_panel(panel) for panel in figure_specs.figures[name]["panels"]]
+
+
+def label_of(panel, value):
+    labels = panel.get("labels") or {}
+    if value in labels:
+        return labels[value]
+    return (panel.get("label") or "{}").format(value)
+
+
+def draw_panel(ax, panel, curves):
+    colors = panel.get("colors") or {}
+    for value, x, y in curves:
+        args = (y,) if x is None else (x, y)
+        if panel.get("fmt"):
+            args += (panel["fmt"],)
+        kwargs = {"label": label_of(panel, value)}
+        if value in colors:
+            kwargs["color"] = colors[value]
+        ax.plot(*args, **kwargs)
+    if "legend" in panel:
+        ax.legend(**panel["legend"])
+    for name, value in (panel.get("axes") or {}).items():
+        setter = getattr(ax, f"set_{name}")
+        if isinstance(value, dict):
+            setter(**value)
+        else:
+            setter(value)
+
+
+def build(name):
+    """Build a figure of figure_specs.figures and save it.
+
+    Returns:
+        bool: False if no panel had any data, then nothing is saved
+    """
+    spec = figure_specs.figures[name]
+    results = compute_results(name)
+    if not any(results):
+        print(f"No data found for {name}")
+        return False
+
+    with profiling.stage("render"):
+        plt = plotting.pyplot(spec.get("style"))
+        subplots = dict(spec.get("subplots") or {})
+        nrows, ncols = subplots.pop("nrows", 1), subplots.pop("ncols", 1)
+        fig, axes = plt.subplots(nrows, ncols, squeeze=False, **subplots)
+        for panel, curves in zip(spec["panels"], results):
+            if not curves:
+                print(f"No data found for {panel['select']}")
+            draw_panel(axes[panel.get("ax", (0, 0))], panel, curves)
+
+        if "tight_layout" in spec:
+            plt.tight_layout(**spec["tight_layout"])
+        if "subplots_adjust" in spec:
+            plt.subplots_adjust(**spec["subplots_adjust"])
+        if "legend" in spec:
+            legend = dict(spec["legend"])
+            handles, labels = axes[legend.pop("panel")].get_legend_handles_labels()
+            legend.setdefault("ncol", len(labels))
+            fig.legend(handles, labels, **legend)
+
+    with profiling.stage("save"):
+        plt.savefig(spec["output"], **(spec.get("savefig") or {}))
+    plt.close(fig)
+    return True
+
+
+def inputs(name, data_dir="data"):
+    """Glob patterns of the data files a figure can read, for the build cache."""
+    patterns = []
+    for panel in figure_specs.figures[name]["panels"]:
+        select = panel["select"]
+        pattern = os.path.join(data_dir, select["dataset"], select.get("pattern", "*.npz"))
+        if pattern not in patterns:
+            patterns.append(pattern)
+    return patterns
+
+
+def outputs(name):
+    return [figure_specs.figures[name]["output"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the figures of figure_specs.py.")
+    parser.add_argument(
+        "figures",
+        nargs="*",
+        default=list(figure_specs.figures),
+        help="figures to build (default: all)",
+    )
+    args = parser.parse_args()
+
+    unknown = [name for name in args.figures if name not in figure_specs.figures]
+    if unknown:
+        print(f"Unknown figures: {', '.join(unknown)}. Available: {', '.join(figure_specs.figures)}")
+        sys.exit(2)
+    for name in args.figures:
+        build(name)
+
+
+if __name__ == "__main__":
+    profiling.write_at_exit()
+    main()
@@ -2,54 +2,107 @@ import os
 import re
 import sys
 import numpy as np
-import matplotlib.pyplot as plt
 import glob
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import utils
-from plotting_formats.plot_format import *
+import datasets
+import plotting
+import profiling
+import stats_cache
 
+# The timeseries are static, so the statistics are only computed once (see stats_cache)
+compute_grad_mean_batch = stats_cache.memoize(utils.compute_grad_mean_batch)
+compute_grad_err_batch = stats_cache.memoize(utils.compute_grad_err_batch)
 
-def process_single_file(filepath):
+
+# Memory budget for the timeseries of a file (and the temporaries of the statistics on them).
+# Larger ansätze are processed in blocks of gradient components that fit into the budget.
+default_memory_budget = int(float(os.environ.get("GRAD_EOM_GF_MEMORY_MB", 1024)) * 2**20)
+# Peak memory per gradient component and sample for the timeseries of the block, the FFTs of the
+# autocorrelation and the jackknife resamples. Measured with tracemalloc: 6.5 to 10 doubles (more for
+# long chains), so 12 doubles leave a safety margin.
+bytes_per_sample = 12 * 8
+# Memory that does not depend on the block: the energy timeseries and its statistics (measured:
+# up to 3 doubles per sample), and the decompression buffers of about 3.5 read chunks
+energy_bytes_per_sample = 4 * 8
+read_buffer_bytes = 4 * datasets.LazyArray.stream_chunk_bytes
+
+# Number of processes for the files, 1 processes them serially (see map_files)
+workers_env_var = "GRAD_EOM_GF_WORKERS"
+
+
+def component_blocks(nlayer, nparams, max_components):
+    """Split the (nlayer, nparams) gradient components into blocks of at most max_components,
+    whole layers if possible, in the C order of the components.
+
+    Yields:
+        tuple: (slice of layers, slice of parameters)
+    """
+    if max_components >= nparams:
+        layers_per_block = max_components // nparams
+        for first in range(0, nlayer, layers_per_block):
+            yield slice(first, min(first + layers_per_block, nlayer)), slice(0, nparams)
+    else:
+        for layer in range(nlayer):
+            for first in range(0, nparams, max_components):
+                yield slice(layer, layer + 1), slice(first, min(first + max_components, nparams))
+
+
+def process_single_file(filepath, memory_budget=None):
     """
     Loads a .npz file containing raw timeseries and computes the gradient error.
+    The gradient components are read and processed in blocks that fit into memory_budget
+    (bytes, default_memory_budget if None), so only the energy timeseries is read in full.
+    A budget smaller than the memory needed for the energy timeseries and a single component is exceeded.
     """
     if not os.path.isfile(filepath):
         return [], []
+    if memory_budget is None:
+        memory_budget = default_memory_budget
 
     try:
-        data = np.load(filepath)
-        
-        energy_ts = data["energy_ts"]
-        grad_norm_ts = data["grad_norm_ts"]
-        
-        # Reconstruct the total energy gradient from components
-        el_grad = -2 * float(data["g_el"]) * data["el_grad_ts"]
-        mass_grad = float(data["g_mass"]) * data["mass_grad_ts"]
-        int_grad = float(data["g_int"]) * data["int_grad_ts"]
-        
-        energy_grad_obsvec = el_grad + mass_grad + int_grad
-        
-        nlayer = int(data["nlayer"])
-        nparams = int(data["nparams"])
-        
-        eom_arr = []
-        mean_arr = []
-
-        # Perform the calculation per layer and parameter
-        for layer in range(nlayer):
-            for grad_ind in range(nparams):
-                
-                current_grad = energy_grad_obsvec[:, layer, grad_ind]
-                current_norm = grad_norm_ts[:, layer, grad_ind]
+        with datasets.open_dataset(filepath) as data:
+            with profiling.stage("load"):
+                energy_ts = np.asarray(data["energy_ts"])
+                g_el = float(data["g_el"])
+                g_mass = float(data["g_mass"])
+                g_int = float(data["g_int"])
 
-                mean = utils.compute_grad_mean(energy_ts, current_grad, current_norm)
-                
-                if np.isclose(mean, 0):
-                    continue
+                nlayer = int(data["nlayer"])
+                nparams = int(data["nparams"])
 
-                eom = utils.compute_grad_err(energy_ts, current_grad, current_norm)
-                
-                eom_arr.append(eom)
-                mean_arr.append(mean)
+            available = memory_budget - energy_bytes_per_sample * len(energy_ts) - read_buffer_bytes
+            max_components = max(1, available // (bytes_per_sample * len(energy_ts)))
+            blocks = list(component_blocks(nlayer, nparams, max_components))
+            keys = ["el_grad_ts", "mass_grad_ts", "int_grad_ts", "grad_norm_ts"]
+            if len(blocks) > 1:
+                # Every block slices all timeseries, map them instead of decompressing them for every block
+                arrays = {key: data[key].memmap() for key in keys}
+            else:
+                arrays = {key: data[key] for key in keys}
+
+            mean_arr = np.empty((nlayer, nparams))
+            eom_arr = np.empty((nlayer, nparams))
+            for layers, params in blocks:
+                block = (slice(None), layers, params)
+                with profiling.stage("load"):
+                    # Reconstruct the total energy gradient from components, in place
+                    current_grad = np.array(arrays["el_grad_ts"][block])
+                    current_grad *= -2 * g_el
+                    current_grad += g_mass * arrays["mass_grad_ts"][block]
+                    current_grad += g_int * arrays["int_grad_ts"][block]
+                    current_norm = np.array(arrays["grad_norm_ts"][block])
+
+                # Perform the calculation for all layers and parameters of the block at once
+                mean_arr[layers, params] = compute_grad_mean_batch(energy_ts, current_grad, current_norm)
+                eom_arr[layers, params] = compute_grad_err_batch(energy_ts, current_grad, current_norm)
+                del current_grad, current_norm
+
+        nonzero = ~np.isclose(mean_arr, 0)
+        eom_arr = eom_arr[nonzero]
+        mean_arr = mean_arr[nonzero]
                 
         return eom_arr, mean_arr
 
@@ -57,44 +110,83 @@ def process_single_file(filepath):
         print(f"Error reading {filepath}: {e}", file=sys.stderr)
         return [], []
 
-def get_max_grad_error_from_files(file_list):
-    """
-    Iterates over a list of files and aggregates the max gradient error.
+def file_ratios(filepath):
+    """Relative errors |EOM / mean| of the nonzero gradient components of a file, as a flat array."""
+    eom, mean = process_single_file(filepath)
+    return np.abs(np.asarray(eom, dtype=float) / np.asarray(mean, dtype=float)).ravel()
+
+
+def map_files(file_list, workers=1):
+    """Compute file_ratios for every file, fanned out over a process pool if workers > 1.
+    The files are handed to the workers in chunks, to keep the scheduling overhead low.
+    Inside a worker process (e.g. paper_plots.py --workers) the files are processed serially,
+    so that the cores are not oversubscribed.
+
+    Returns:
+        list of np.ndarray: file_ratios of every file, in the order of file_list
     """
-    all_eom = []
-    all_mean = []
+    if workers <= 1 or len(file_list) <= 1 or multiprocessing.parent_process() is not None:
+        return [file_ratios(fname) for fname in file_list]
+    workers = min(workers, len(file_list))
+    chunksize = max(1, len(file_list) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(file_ratios, file_list, chunksize=chunksize))
 
-    for fname in file_list:
-        eom, mean = process_single_file(fname)
-        all_eom.extend(eom)
-        all_mean.extend(mean)
 
-    if not all_eom:
+def summarize_ratios(ratio_arrays):
+    """Reduce the relative errors of many files to the max gradient error and its standard error."""
+    if not ratio_arrays:
+        return np.nan, np.nan
+    ratio_arr = np.concatenate(ratio_arrays)
+    if not ratio_arr.size:
         return np.nan, np.nan
 
     # Compute final statistics
-    ratio_arr = np.abs(np.asarray(all_eom) / np.asarray(all_mean))
-    
     max_error = np.max(ratio_arr)
-    std_error = np.std(ratio_arr) / np.sqrt(len(all_eom))
+    std_error = np.std(ratio_arr) / np.sqrt(ratio_arr.size)
 
     return max_error, std_error
 
 
-def main():
-    """Maximal relative error on the mean among energy
-    gradient components for different gauge fixing trees"""
+def get_max_grad_error_from_files(file_list, workers=1):
+    """
+    Iterates over a list of files and aggregates the max gradient error.
+    """
+    return summarize_ratios(map_files(file_list, workers))
+
+
+def default_workers():
+    value = os.environ.get(workers_env_var, "")
+    try:
+        return max(1, int(value)) if value else 1
+    except ValueError:
+        print(f"Invalid {workers_env_var}={value}, processing the files serially", file=sys.stderr)
+        return 1
+
+
+@profiling.stage("compute")
+def compute_results(workers=None):
+    """Maximal relative error on the mean among energy gradient
+    components for different gauge fixing trees, without plotting.
+    The files of all subfolders are processed together, see map_files.
+
+    Args:
+        workers (int): Number of processes, GRAD_EOM_GF_WORKERS (default 1, serial) if None
+
+    Returns:
+        dict: gauge fixing type -> list of (g, max error, std error),
+            or None if the data folder is missing
+    """
     base_folder = "data/grad_gf" 
     results = {}
     
-    labels = {"c": "Chessboard", "T": "Maximal Tree", "F": "No Gauge Fixing"}
-    colors = {"c": "tab:orange", "T": "tab:red", "F": "tab:blue"}
     pattern = r"L_4_g_([0-9.]+)_gf_([A-Za-z0-9]+)"
 
     if not os.path.exists(base_folder):
         print(f"Error: Data folder '{base_folder}' not found.")
-        return
+        return None
 
+    folders = []
     for subfolder in os.listdir(base_folder):
         match = re.match(pattern, subfolder)
         if match:
@@ -107,41 +199,71 @@ def main():
             npz_files = glob.glob(os.path.join(subfolder_path, "*.npz"))
             
             if npz_files:
-                max_grad, std = get_max_grad_error_from_files(npz_files)
-                if c_value not in results: results[c_value] = []
-                results[c_value].append((g_value, max_grad, std))
+                folders.append((c_value, g_value, npz_files))
 
-    
-    fig, ax = plt.subplots()
+    all_files = [fname for _, _, npz_files in folders for fname in npz_files]
+    all_ratios = iter(map_files(all_files, workers or default_workers()))
+    for c_value, g_value, npz_files in folders:
+        max_grad, std = summarize_ratios([next(all_ratios) for _ in npz_files])
+        if c_value not in results: results[c_value] = []
+        results[c_value].append((g_value, max_grad, std))
+
+    return results
+
+
+def main(workers=None):
+    """Maximal relative error on the mean among energy
+    gradient components for different gauge fixing trees"""
+    labels = {"c": "Chessboard", "T": "Maximal Tree", "F": "No Gauge Fixing"}
+    colors = {"c": "tab:orange", "T": "tab:red", "F": "tab:blue"}
+
+    results = compute_results(workers)
+    if results is None:
+        return
+
+    with profiling.stage("render"):
+        plt = plotting.pyplot("plot_format")
+        fig, ax = plt.subplots()
 
-    plot_order = ["F", "c", "T"]
+        plot_order = ["F", "c", "T"]
     
-    for c_value in plot_order:
-        if c_value in results:
-            data = results[c_value]
-            data.sort()
+        for c_value in plot_order:
+            if c_value in results:
+                data = results[c_value]
+                data.sort()
             
-            g_vals = [x[0] for x in data]
-            grad_vals = [x[1] for x in data]
-            limit = min(len(g_vals), 12)
+                g_vals = [x[0] for x in data]
+                grad_vals = [x[1] for x in data]
+                limit = min(len(g_vals), 12)
             
-            ax.plot(
-                g_vals[:limit],
-                grad_vals[:limit],
-                marker="o",
-                label=labels[c_value],
-                color=colors[c_value]
-            )
-
-    ax.set_xlabel(r"$\lambda$")
-    ax.set_ylabel(r"Max $\frac{\text{EOM}}{\text{mean}}$ of gradient components")
-    ax.set_xlim(0.17, 2.05)
-    ax.set_ylim(0.02, 0.4)
-    ax.legend(frameon=False) 
+                ax.plot(
+                    g_vals[:limit],
+                    grad_vals[:limit],
+                    marker="o",
+                    label=labels[c_value],
+                    color=colors[c_value]
+                )
+
+        ax.set_xlabel(r"$\lambda$")
+        ax.set_ylabel(r"Max $\frac{\text{EOM}}{\text{mean}}$ of gradient components")
+        ax.set_xlim(0.17, 2.05)
+        ax.set_ylim(0.02, 0.4)
+        ax.legend(frameon=False) 
     
-    output_file = "figures/eom_gf_grad.pdf"
-    plt.tight_layout()
-    plt.savefig(output_file)
+        output_file = "figures/eom_gf_grad.pdf"
+        plt.tight_layout()
+    with profiling.stage("save"):
+        plt.savefig(output_file)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Plot the maximal EOM / mean of the energy gradient components.")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help=f"number of processes for the files (default: ${workers_env_var} or 1, serial)",
+    )
+    args = parser.parse_args()
+    profiling.write_at_exit()
+    main(args.workers)
\ No newline at end of file
@@ -0,0 +1,57 @@
+import numpy as np
+
+
+# ========= Jackknife Resampling ====================
+
+
+def jackknife_resampling(data, axis=0):
+    """Generate jackknife resamples of the data, i.e., the leave-one-out means along axis.
+    The i-th resample is obtained in closed form from (sum - x_i) / (n - 1), so all n resamples
+    cost O(n) instead of recomputing a full mean for every sample.
+
+    Args:
+        data (np.ndarray): Samples along axis, any number of additional axes
+        axis (int): Axis of the samples
+
+    Returns:
+        np.ndarray: Leave-one-out means, same shape as data
+    """
+    data = np.asarray(data)
+    n = data.shape[axis]
+    return (np.sum(data, axis=axis, keepdims=True) - data) / (n - 1)
+
+
+def jackknife_error(resamples, axis=0):
+    """Calculate the jackknife error from the jackknife resamples of an estimator.
+
+    Args:
+        resamples (np.ndarray): Estimator evaluated on every jackknife resample, along axis
+        axis (int): Axis of the resamples
+
+    Returns:
+        float or np.ndarray: Jackknife error. The output shape is the input shape without axis.
+    """
+    n = resamples.shape[axis]
+    mean = np.mean(resamples, axis=axis, keepdims=True)
+    return np.sqrt((n - 1) * np.mean((resamples - mean) ** 2, axis=axis))
+
+
+def jackknife(estimator, *datavecs, axis=0):
+    """Jackknife estimation of a derived quantity of the means of several timeseries.
+    The estimator is called once with the jackknife resamples of every datavec,
+    so it has to act element-wise (e.g. lambda x, y: x / y), and all resamples
+    of all components are evaluated in a single call.
+
+    Args:
+        estimator (callable): Function of the means of the datavecs (in the same order)
+        datavecs (np.ndarray): Timeseries - rebinned data, i.e., not autocorrelated, with the samples along axis
+        axis (int): Axis of the samples
+
+    Returns:
+        tuple of
+            mean: mean of the estimator over the jackknife resamples
+            err: jackknife error of the estimator
+    """
+    resamples = estimator(*[jackknife_resampling(datavec, axis) for datavec in datavecs])
+    resamples = np.asarray(resamples)
+    return np.mean(resamples, axis=axis), jackknife_error(resamples, axis)
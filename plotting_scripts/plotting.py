@@ -0,0 +1,31 @@
+import sys
+import importlib
+
+
+# ========= Lazy Plotting Bootstrap ====================
+
+
+def pyplot(style=None):
+    """Import matplotlib.pyplot with the non-interactive Agg backend and apply a plotting format.
+    Call this only when a figure is about to be drawn, so that computing the results of a script
+    neither imports matplotlib nor changes its global state.
+
+    Args:
+        style (str): Module in plotting_formats, e.g. "plot_format_two_rows"
+
+    Returns:
+        module: matplotlib.pyplot
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    if style is not None:
+        module_name = f"plotting_formats.{style}"
+        if module_name in sys.modules:
+            # The format is applied when its module is executed, so execute it again
+            importlib.reload(sys.modules[module_name])
+        else:
+            importlib.import_module(module_name)
+    return plt
@@ -0,0 +1,241 @@
+import os
+import sys
+import csv
+import json
+import time
+import atexit
+import contextlib
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+# ========= Stage Profiling ====================
+
+# Profiling is switched on by setting this environment variable to the output directory of the
+# traces ("1" for the default directory), or with `python paper_plots.py --profile`.
+env_var = "PAPER_PLOTS_PROFILE"
+chrome_env_var = "PAPER_PLOTS_CHROME_TRACE"
+# Tracing the allocated bytes with tracemalloc slows down python-heavy stages (matplotlib) a lot,
+# so it has its own switch. Without it only the peak resident memory of the process is recorded.
+memory_env_var = "PAPER_PLOTS_PROFILE_MEMORY"
+default_dir = "profiles"
+
+events = []
+_stack = []
+_labels = []
+_writes_at_exit = False
+
+
+def enabled():
+    return bool(os.environ.get(env_var))
+
+
+def memory_enabled():
+    return enabled() and bool(os.environ.get(memory_env_var))
+
+
+def max_rss():
+    """Peak resident memory of the process in bytes, or None if it cannot be determined."""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux, but in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def output_dir():
+    value = os.environ.get(env_var, "")
+    return default_dir if value in ("", "1") else value
+
+
+class stage(contextlib.ContextDecorator):
+    """Record the wall time, CPU time and memory of a stage of the figure pipeline.
+    Use as a context manager, `with profiling.stage("save"): ...`, or as a decorator,
+    `@profiling.stage("compute")`. Stages can be nested. Does nothing unless profiling is enabled.
+    The allocated bytes (peak above the memory at the start of the stage) and retained bytes are
+    only recorded if memory tracing is enabled, otherwise they are None.
+
+    Args:
+        name (str): Stage, one of "script", "discover", "load", "compute", "render" or "save"
+        label (str): What is processed in the stage, e.g. the script name
+    """
+
+    def __init__(self, name, label=None):
+        self.name = name
+        self.label = label
+
+    def __enter__(self):
+        if not enabled():
+            return self
+        current = None
+        if memory_enabled():
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            current, peak = tracemalloc.get_traced_memory()
+            if _stack:
+                _stack[-1]["peak"] = max(_stack[-1]["peak"], peak)
+            tracemalloc.reset_peak()
+        _stack.append(
+            {
+                "start": time.time(),
+                "wall": time.perf_counter(),
+                "cpu": time.process_time(),
+                "memory": current,
+                "peak": current,
+                "children_wall": 0.0,
+            }
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        if not enabled() or not _stack:
+            return False
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        frame = _stack.pop()
+        wall -= frame["wall"]
+        if _stack:
+            _stack[-1]["children_wall"] += wall
+        allocated = retained = None
+        if frame["memory"] is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(frame["peak"], peak)
+            if _stack and _stack[-1]["peak"] is not None:
+                _stack[-1]["peak"] = max(_stack[-1]["peak"], peak)
+            tracemalloc.reset_peak()
+            allocated = peak - frame["memory"]
+            retained = current - frame["memory"]
+        events.append(
+            {
+                "stage": self.name,
+                "label": self.label or (_labels[-1] if _labels else ""),
+                "pid": os.getpid(),
+                "depth": len(_stack),
+                "start": frame["start"],
+                "wall": wall,
+                "self_wall": wall - frame["children_wall"],
+                "cpu": cpu - frame["cpu"],
+                "allocated": allocated,
+                "retained": retained,
+                "max_rss": max_rss(),
+            }
+        )
+        return False
+
+
+@contextlib.contextmanager
+def script(name):
+    """Stage of a whole script. The stages recorded inside it are labeled with the script name."""
+    _labels.append(name)
+    try:
+        with stage("script", name):
+            yield
+    finally:
+        _labels.pop()
+
+
+def drain():
+    """Return the recorded events and forget them, e.g. to send them from a worker process to the runner."""
+    drained = list(events)
+    events.clear()
+    return drained
+
+
+def write_trace(trace_events, directory=None, chrome=None):
+    """Write the events of a run as JSON and CSV, and optionally as a Chrome trace-event file
+    (open it in chrome://tracing or https://ui.perfetto.dev).
+
+    Args:
+        trace_events (list): Recorded events, see stage
+        directory (str): Output directory, see output_dir
+        chrome (bool): Also write the Chrome trace, by default if PAPER_PLOTS_CHROME_TRACE is set
+
+    Returns:
+        list: Paths of the written files
+    """
+    directory = directory or output_dir()
+    if chrome is None:
+        chrome = bool(os.environ.get(chrome_env_var))
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, time.strftime("trace_%Y%m%d-%H%M%S") + f"_{os.getpid()}")
+    trace_events = sorted(trace_events, key=lambda event: event["start"])
+
+    paths = [f"{base}.json", f"{base}.csv"]
+    with open(paths[0], "w") as f:
+        json.dump(trace_events, f, indent=1)
+    columns = ["stage", "label", "pid", "depth", "start", "wall", "self_wall", "cpu", "allocated", "retained", "max_rss"]
+    with open(paths[1], "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(trace_events)
+
+    if chrome:
+        paths.append(f"{base}.chrome.json")
+        with open(paths[2], "w") as f:
+            json.dump({"traceEvents": chrome_trace_events(trace_events)}, f)
+    return paths
+
+
+def chrome_trace_events(trace_events):
+    """Convert the events to complete ("X") events of the Chrome trace-event format, one track per process."""
+    chrome_events = []
+    for event in trace_events:
+        chrome_events.append(
+            {
+                "name": event["stage"] if event["stage"] != "script" else event["label"],
+                "cat": event["stage"],
+                "ph": "X",
+                "ts": event["start"] * 1e6,
+                "dur": event["wall"] * 1e6,
+                "pid": event["pid"],
+                "tid": event["pid"],
+                "args": {
+                    "label": event["label"],
+                    "cpu_ms": event["cpu"] * 1e3,
+                    "allocated_bytes": event["allocated"],
+                    "retained_bytes": event["retained"],
+                    "max_rss_bytes": event["max_rss"],
+                },
+            }
+        )
+    return chrome_events
+
+
+def summary(trace_events):
+    """Totals of every stage. The wall and CPU times include nested stages, the self wall time does not.
+
+    Returns:
+        dict: stage -> {"wall": seconds, "self_wall": seconds, "cpu": seconds,
+            "allocated": largest allocation in bytes, "max_rss": bytes} (memory is None if not recorded)
+    """
+    totals = {}
+    for event in trace_events:
+        total = totals.setdefault(
+            event["stage"], {"wall": 0.0, "self_wall": 0.0, "cpu": 0.0, "allocated": None, "max_rss": None}
+        )
+        for key in ("wall", "self_wall", "cpu"):
+            total[key] += event[key]
+        for key in ("allocated", "max_rss"):
+            if event[key] is not None:
+                total[key] = max(total[key] or 0, event[key])
+    return totals
+
+
+def _write_remaining():
+    if enabled() and events:
+        for path in write_trace(drain()):
+            print(f"Wrote profile trace {path}")
+
+
+def write_at_exit():
+    """Write the trace of this process when it exits, if profiling is enabled. Only called by the
+    scripts that are run on their own (not through paper_plots.py, which writes the trace itself),
+    so that importing the helpers, or a worker process that inherited the environment, never writes one."""
+    global _writes_at_exit
+    if enabled() and not _writes_at_exit:
+        atexit.register(_write_remaining)
+        _writes_at_exit = True
@@ -0,0 +1,231 @@
+import os
+import sys
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import efficiency
+
+
+# ========= Scaling Laws of the Update Cost with the Lattice Size ====================
+#
+# The eom_us runs (L = 2, 4, 6, update sizes from one link to all links) are fitted with power laws
+# y = A * N_links^a * f^b in the number of links N_links = 2 L^2 and the update fraction f = n / N_links,
+# by linear least squares in log space, for
+#   - the seconds per step,
+#   - the steps needed to reach the target EOM / mean, which grows with tau_int and the relative variance
+#     of the energy, and is measured for every L (unlike tau_int, see efficiency.py),
+#   - tau_int, where it is known (only L = 6, so against f alone).
+# The compute budget of a run is the product of the first two. Its uncertainty combines the covariance
+# of the fit parameters and the scatter of the runs around the fit, as a band in log space.
+
+default_sizes = [8, 10, 12, 14, 16]
+default_fractions = [1 / 8, 1 / 4, 1 / 2, 3 / 4]
+
+
+def n_links(L):
+    return 2 * L**2
+
+
+def collect_runs(target=0.01):
+    """Cost of every eom_us run, see efficiency.run_efficiency.
+
+    Returns:
+        list of dicts: L, n, n_links, fraction, and the results of efficiency.run_efficiency
+    """
+    runs = []
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for group, choice, steps, times, rel_eom, autocorr in efficiency.run_sources["eom_us"]():
+            L = int(group.split("=")[1])
+            n = int(choice.split("=")[1])
+            result = efficiency.run_efficiency(steps, times, rel_eom, autocorr, target)
+            runs.append(dict(result, L=L, n=n, n_links=n_links(L), fraction=n / n_links(L)))
+    return runs
+
+
+def _design(links, fraction, use_links=True):
+    columns = [np.ones(len(fraction)), np.log(fraction)]
+    if use_links:
+        columns.insert(1, np.log(links))
+    return np.stack(columns, axis=1)
+
+
+def fit_power_law(links, fraction, y):
+    """Fit log y = log A + a log N_links + b log f by least squares. Points with a non-finite or
+    non-positive y are ignored. If all points have the same N_links, only the dependence on f is fitted.
+
+    Args:
+        links (np.ndarray): Number of links N_links of every run
+        fraction (np.ndarray): Update fraction n / N_links of every run
+        y (np.ndarray): Fitted quantity
+
+    Returns:
+        dict: "coefficients" (log A, a, b) or (log A, b), their "covariance", the "residual_variance"
+            of the runs around the fit in log space, "use_links" and the number of "points";
+            None if there are not more points than parameters
+    """
+    links, fraction, y = (np.asarray(values, dtype=float) for values in (links, fraction, y))
+    valid = np.isfinite(y) & (y > 0)
+    links, fraction, y = links[valid], fraction[valid], y[valid]
+    use_links = len(np.unique(links)) > 1
+    X = _design(links, fraction, use_links)
+    if len(y) <= X.shape[1]:
+        return None
+    coefficients, _, _, _ = np.linalg.lstsq(X, np.log(y), rcond=None)
+    residuals = np.log(y) - X @ coefficients
+    residual_variance = residuals @ residuals / (len(y) - X.shape[1])
+    return {
+        "coefficients": coefficients,
+        "covariance": residual_variance * np.linalg.inv(X.T @ X),
+        "residual_variance": residual_variance,
+        "use_links": use_links,
+        "points": len(y),
+    }
+
+
+def predict(fit, links, fraction):
+    """Prediction of a power law fit, see fit_power_law.
+
+    Returns:
+        tuple: (log of the prediction, standard deviation of the log), the standard deviation
+            includes the scatter of single runs around the fit
+    """
+    links = np.atleast_1d(np.asarray(links, dtype=float))
+    fraction = np.broadcast_to(np.asarray(fraction, dtype=float), links.shape)
+    X = _design(links, fraction, fit["use_links"])
+    log_y = X @ fit["coefficients"]
+    log_std = np.sqrt(np.einsum("ij,jk,ik->i", X, fit["covariance"], X) + fit["residual_variance"])
+    return log_y, log_std
+
+
+def fit_scaling(runs):
+    """Fit the power laws of the seconds per step, the steps to the target and tau_int, see fit_power_law."""
+    links = [run["n_links"] for run in runs]
+    fraction = [run["fraction"] for run in runs]
+    return {
+        key: fit_power_law(links, fraction, [run[key] for run in runs])
+        for key in ("seconds_per_step", "steps_to_target", "tau_int")
+    }
+
+
+def budgets(fits, sizes=None, fractions=None, num_std=1):
+    """Extrapolated compute budget to reach the target, for every lattice size and update fraction.
+
+    Args:
+        fits (dict): Result of fit_scaling
+        sizes (list): Lattice sizes L, default_sizes if None
+        fractions (list): Update fractions n / N_links, default_fractions if None
+        num_std (float): Width of the uncertainty band in standard deviations
+
+    Returns:
+        list of dicts: L, n_links, n (rounded to at least one link), fraction, and steps, seconds_per_step
+            and seconds to the target, each as (prediction, lower, upper)
+    """
+    sizes = default_sizes if sizes is None else sizes
+    fractions = default_fractions if fractions is None else fractions
+    rows = []
+    for L in sizes:
+        for fraction in fractions:
+            n = max(1, int(round(fraction * n_links(L))))
+            row = {"L": L, "n_links": n_links(L), "n": n, "fraction": n / n_links(L)}
+            log_total = 0.0
+            log_variance = 0.0
+            for key in ("steps_to_target", "seconds_per_step"):
+                log_y, log_std = predict(fits[key], n_links(L), row["fraction"])
+                row[key] = _band(log_y[0], log_std[0], num_std)
+                log_total += log_y[0]
+                log_variance += log_std[0] ** 2  # the two fits are independent
+            row["seconds"] = _band(log_total, np.sqrt(log_variance), num_std)
+            rows.append(row)
+    return rows
+
+
+def _band(log_y, log_std, num_std):
+    return np.exp(log_y), np.exp(log_y - num_std * log_std), np.exp(log_y + num_std * log_std)
+
+
+def plot_budgets(rows, output_filename):
+    """Extrapolated budgets against L with their uncertainty bands, one curve per update fraction."""
+    import plotting
+
+    plt = plotting.pyplot("plot_format")
+    if plt.get_fignums(): plt.clf()
+    for fraction in sorted({round(row["fraction"], 3) for row in rows}):
+        selected = [row for row in rows if round(row["fraction"], 3) == fraction]
+        sizes = [row["L"] for row in selected]
+        hours = np.array([row["seconds"] for row in selected]) / 3600
+        line, = plt.plot(sizes, hours[:, 0], label=f"$n/N_{{\\text{{links}}}}={fraction:g}$")
+        plt.fill_between(sizes, hours[:, 1], hours[:, 2], color=line.get_color(), alpha=0.2, linewidth=0)
+    plt.yscale("log")
+    plt.xlabel("$L$")
+    plt.ylabel("Time to target [h]")
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(output_filename)
+    plt.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fit the update cost and autocorrelation of the eom_us runs against the lattice size "
+        "and update fraction, and extrapolate the compute budget to larger lattices."
+    )
+    parser.add_argument("-t", "--target", type=float, default=0.01, help="target EOM / mean (default: 0.01)")
+    parser.add_argument(
+        "-L", "--sizes", type=int, nargs="+", default=default_sizes, help="lattice sizes (default: 8 10 12 14 16)"
+    )
+    parser.add_argument(
+        "-f",
+        "--fractions",
+        type=float,
+        nargs="+",
+        default=default_fractions,
+        help="update fractions n / N_links (default: 0.125 0.25 0.5 0.75)",
+    )
+    parser.add_argument("--std", type=float, default=1, help="width of the uncertainty bands in standard deviations")
+    parser.add_argument("-o", "--output", help="also plot the budgets with their bands to this file")
+    args = parser.parse_args()
+
+    runs = collect_runs(args.target)
+    if not runs:
+        print("No data found for eom_us")
+        return
+    fits = fit_scaling(runs)
+
+    print(f"Power law fits y = A * N_links^a * f^b to {len(runs)} runs (log-space scatter of the runs in brackets)")
+    for key, fit in fits.items():
+        if fit is None:
+            print(f"  {key:<17} not enough runs")
+            continue
+        coefficients = fit["coefficients"]
+        errors = np.sqrt(np.diag(fit["covariance"]))
+        exponent_a = f"a = {coefficients[1]:6.3f} +- {errors[1]:.3f}" if fit["use_links"] else f"{'(only one L)':<20}"
+        print(
+            f"  {key:<17} A = {np.exp(coefficients[0]):9.3g}  {exponent_a}  "
+            f"b = {coefficients[-1]:6.3f} +- {errors[-1]:.3f}  ({np.sqrt(fit['residual_variance']):.2f}, {fit['points']} runs)"
+        )
+    if fits["seconds_per_step"] is None or fits["steps_to_target"] is None:
+        return
+
+    rows = budgets(fits, args.sizes, args.fractions, args.std)
+    print(f"\nExtrapolated budgets for EOM / mean <= {args.target:g} ({args.std:g} sigma bands)")
+    print(f"  {'L':>3} {'N_links':>8} {'n':>5} {'s / step':>22} {'steps':>28} {'time [h]':>28}")
+    for row in rows:
+        columns = [
+            f"{row[key][0]:8.3g} [{row[key][1]:.3g}, {row[key][2]:.3g}]"
+            for key in ("seconds_per_step", "steps_to_target")
+        ]
+        hours = np.array(row["seconds"]) / 3600
+        print(
+            f"  {row['L']:3d} {row['n_links']:8d} {row['n']:5d} {columns[0]:>22} {columns[1]:>28} "
+            f"{f'{hours[0]:8.3g} [{hours[1]:.3g}, {hours[2]:.3g}]':>28}"
+        )
+
+    if args.output:
+        plot_budgets(rows, args.output)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import os
+import sys
+import pickle
+import hashlib
+import functools
+import collections
+import numpy as np
+import build_cache
+
+
+# ========= Memoization of Derived Statistics ====================
+#
+# Results are keyed on a content hash of the input arrays, the other arguments and the code of the
+# function (its module and the local modules it imports, see build_cache.imported_helpers), so a
+# change of the code or the data never returns a stale result. Results are kept in an in-memory
+# LRU tier for the running process and in a size-bounded directory on disk, shared between runs
+# and processes, from which the least recently used results are evicted.
+
+# Directory of the disk tier, or "0" to switch the cache off
+env_var = "PAPER_PLOTS_STATS_CACHE"
+default_dir = ".stats_cache"
+max_disk_bytes = 2**30
+evict_to_fraction = 0.9  # once the disk tier is full, evict down to this fraction of max_disk_bytes
+max_memory_bytes = 2**28
+
+scripts_dir = os.path.dirname(os.path.abspath(__file__))
+
+_memory = collections.OrderedDict()  # key -> pickled result
+_memory_bytes = 0
+_code_digests = {}
+_disk_bytes = {}  # directory -> running total of the sizes of its results, see _write_disk
+counts = {"hits": 0, "misses": 0}
+
+
+def enabled():
+    return os.environ.get(env_var, "") != "0"
+
+
+def cache_dir():
+    value = os.environ.get(env_var, "")
+    return default_dir if value in ("", "1") else value
+
+
+def _update_hash(h, value):
+    """Feed an argument into the hash. Arrays are hashed by dtype, shape and content."""
+    if isinstance(value, (list, tuple)):
+        h.update(f"{type(value).__name__}{len(value)}(".encode())
+        for item in value:
+            _update_hash(h, item)
+        h.update(b")")
+    elif isinstance(value, dict):
+        h.update(f"dict{len(value)}(".encode())
+        for key in sorted(value):
+            _update_hash(h, key)
+            _update_hash(h, value[key])
+        h.update(b")")
+    elif value is None or isinstance(value, (bool, int, float, complex, str, np.generic)):
+        h.update(f"{type(value).__name__}:{value!r};".encode())
+    elif isinstance(value, np.ndarray) or hasattr(value, "__array__"):
+        arr = np.ascontiguousarray(value)
+        if arr.dtype.hasobject:
+            raise TypeError("Arrays of objects cannot be hashed")
+        h.update(f"ndarray:{arr.dtype.str}:{arr.shape};".encode())
+        h.update(memoryview(arr.reshape(-1)).cast("B"))
+    else:
+        raise TypeError(f"Arguments of type {type(value).__name__} cannot be hashed")
+
+
+def _code_digest(func):
+    """Hash of the code a function depends on: the file of its module and the local modules it imports."""
+    module_file = getattr(sys.modules.get(func.__module__), "__file__", None)
+    if module_file not in _code_digests:
+        h = hashlib.sha256()
+        if module_file:
+            for path in [module_file] + build_cache.imported_helpers(module_file, scripts_dir):
+                with open(path, "rb") as f:
+                    h.update(f.read())
+        _code_digests[module_file] = h.hexdigest()
+    return _code_digests[module_file]
+
+
+def call_key(func, version, args, kwargs):
+    """Cache key of a call, raises TypeError if an argument cannot be hashed."""
+    h = hashlib.sha256()  # the fastest of the hashlib hashes on CPUs with SHA extensions
+    h.update(f"{func.__module__}.{func.__qualname__}:{version}:{_code_digest(func)};".encode())
+    _update_hash(h, args)
+    _update_hash(h, kwargs)
+    return h.hexdigest()
+
+
+def _remember(key, payload):
+    """Put a pickled result in the in-memory tier, evicting the least recently used ones."""
+    global _memory_bytes
+    if len(payload) > max_memory_bytes:
+        return
+    if key in _memory:
+        _memory_bytes -= len(_memory.pop(key))
+    _memory[key] = payload
+    _memory_bytes += len(payload)
+    while _memory_bytes > max_memory_bytes:
+        _, evicted = _memory.popitem(last=False)
+        _memory_bytes -= len(evicted)
+
+
+def _read_disk(key):
+    path = os.path.join(cache_dir(), f"{key}.pkl")
+    try:
+        with open(path, "rb") as f:
+            payload = f.read()
+        os.utime(path)  # the modification time marks the last use
+        return payload
+    except OSError:
+        return None
+
+
+def _scan(directory):
+    """(mtime_ns, size, name) of every result on disk."""
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(".pkl"):
+            continue
+        try:
+            stat = os.stat(os.path.join(directory, name))
+        except FileNotFoundError:  # evicted by another process
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, name))
+    return entries
+
+
+def _write_disk(key, payload):
+    """Store a pickled result on disk, evicting the least recently used results if the directory is too large.
+    The size of the directory is scanned once per process and then kept as a running total, so the directory
+    is only listed again when the total exceeds max_disk_bytes. The eviction rescans it, which also picks up
+    the results written by other processes in the meantime."""
+    directory = cache_dir()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        if directory not in _disk_bytes:
+            _disk_bytes[directory] = sum(size for _, size, _ in _scan(directory))
+        tmp_path = os.path.join(directory, f"{key}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, os.path.join(directory, f"{key}.pkl"))
+        _disk_bytes[directory] += len(payload)
+        if _disk_bytes[directory] > max_disk_bytes:
+            evict(int(evict_to_fraction * max_disk_bytes), directory)
+    except OSError as e:
+        print(f"Could not write to the statistics cache {directory}: {e}", file=sys.stderr)
+
+
+def evict(max_bytes, directory=None):
+    """Delete the least recently used results on disk until the cache is not larger than max_bytes."""
+    directory = directory or cache_dir()
+    entries = _scan(directory)
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+        total -= size
+    _disk_bytes[directory] = total
+
+
+def clear():
+    """Forget all results, in memory and on disk."""
+    global _memory_bytes
+    _memory.clear()
+    _memory_bytes = 0
+    evict(0)
+
+
+def memoize(func=None, version=0):
+    """Cache the results of a deterministic function of arrays and scalars.
+    Every call returns a fresh copy of the result, so it can be modified by the caller.
+    Calls with arguments that cannot be hashed are not cached. The original function is
+    available as the attribute `uncached`.
+
+    Example: compute_grad_err_batch = stats_cache.memoize(utils.compute_grad_err_batch)
+
+    Args:
+        func (callable): Function to cache
+        version (int or str): Increase to invalidate the cached results by hand, e.g. when
+            a dependency outside of plotting_scripts changed
+
+    Returns:
+        callable: Function with the same signature
+    """
+    if func is None:
+        return functools.partial(memoize, version=version)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled():
+            return func(*args, **kwargs)
+        try:
+            key = call_key(func, version, args, kwargs)
+        except TypeError:
+            return func(*args, **kwargs)
+
+        payload = _memory.get(key)
+        if payload is not None:
+            _memory.move_to_end(key)
+        else:
+            payload = _read_disk(key)
+            if payload is not None:
+                _remember(key, payload)
+        if payload is not None:
+            try:
+                result = pickle.loads(payload)
+                counts["hits"] += 1
+                return result
+            except Exception:  # truncated or written by an incompatible version, compute it again
+                pass
+
+        counts["misses"] += 1
+        result = func(*args, **kwargs)
+        payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        _remember(key, payload)
+        _write_disk(key, payload)
+        return result
+
+    wrapper.uncached = func
+    return wrapper
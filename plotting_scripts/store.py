@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import contextlib
+import numpy as np
+import catalog
+import datasets
+import profiling
+
+
+# ========= Consolidated Storage of a Dataset ====================
+#
+# A store holds all runs of a dataset (e.g. all .npz archives in data/gf) in a single
+# uncompressed archive data/<dataset>.store with the members
+#   __table__        JSON list with one record per run: the source archive ("source", "size",
+#                    "mtime_ns"), its scalar fields ("fields") and the names of its arrays ("arrays")
+#   values/<key>     the arrays <key> of all runs, concatenated along the first axis
+#   offsets/<key>    start of the array of run i in values/<key> at offsets[i], end at offsets[i + 1]
+# Since the archive is uncompressed, the values are memory-mapped and every run only reads its slice.
+
+
+def store_path(dataset, data_dir="data"):
+    return os.path.join(data_dir, f"{dataset}.store")
+
+
+def convert_dataset(dataset, data_dir="data"):
+    """Convert all .npz archives of a dataset into a single store.
+
+    Args:
+        dataset (str): Subdirectory of data_dir, e.g. "gf"
+        data_dir (str): Data directory
+
+    Returns:
+        str: Path of the store
+    """
+    table = []
+    arrays = {}
+    for entry in catalog.select(dataset=dataset, data_dir=data_dir):
+        with datasets.open_dataset(entry["path"]) as data:
+            record = {
+                "source": os.path.relpath(entry["path"], data_dir),
+                "size": entry["size"],
+                "mtime_ns": entry["mtime_ns"],
+                "fields": entry["fields"],
+                "arrays": list(entry["shapes"]),
+            }
+            for key in record["arrays"]:
+                arrays.setdefault(key, {})[len(table)] = np.asarray(data[key])
+        table.append(record)
+
+    members = {"__table__": np.array(json.dumps(table))}
+    for key, runs in arrays.items():
+        parts = list(runs.values())
+        if any(p.shape[1:] != parts[0].shape[1:] or p.dtype != parts[0].dtype for p in parts):
+            raise ValueError(f"Arrays '{key}' of dataset {dataset} differ in dtype or trailing shape")
+        lengths = [len(runs[i]) if i in runs else 0 for i in range(len(table))]
+        members[f"values/{key}"] = np.concatenate(parts)
+        members[f"offsets/{key}"] = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+
+    path = store_path(dataset, data_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **members)
+    os.replace(tmp_path, path)
+    return path
+
+
+class Run:
+    """A single run of a store, with the same item access as datasets.Dataset."""
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+        self._record = store.table[index]
+
+    @property
+    def files(self):
+        return list(self._record["fields"]) + self._record["arrays"]
+
+    def keys(self):
+        return self.files
+
+    def __contains__(self, key):
+        return key in self._record["fields"] or key in self._record["arrays"]
+
+    def __getitem__(self, key):
+        if key in self._record["fields"]:
+            return np.asarray(self._record["fields"][key])
+        if key not in self._record["arrays"]:
+            raise KeyError(f"{key} is not a file in {self._record['source']}")
+        offsets = self._store.offsets(key)
+        return self._store.values(key)[offsets[self._index] : offsets[self._index + 1]]
+
+
+class Store:
+    """Read-only access to the store of a dataset. Use as a context manager to close the file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._data = datasets.open_dataset(path)
+        self.table = json.loads(str(self._data["__table__"]))
+        self._offsets = {}
+        self._index = {record["source"]: i for i, record in enumerate(self.table)}
+
+    def __len__(self):
+        return len(self.table)
+
+    def offsets(self, key):
+        if key not in self._offsets:
+            self._offsets[key] = np.asarray(self._data[f"offsets/{key}"])
+        return self._offsets[key]
+
+    def values(self, key):
+        return self._data[f"values/{key}"]
+
+    def __contains__(self, source):
+        return source in self._index
+
+    def run(self, source):
+        """Run of the source archive (path relative to the data directory)."""
+        return Run(self, self._index[source])
+
+    def runs(self):
+        return [Run(self, i) for i in range(len(self.table))]
+
+    def sources(self):
+        return {(record["source"], record["size"], record["mtime_ns"]) for record in self.table}
+
+    def close(self):
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_current_store(dataset, data_dir="data"):
+    """Open the store of a dataset, if it exists and is up to date with the .npz archives of the dataset.
+
+    Returns:
+        Store or None
+    """
+    path = store_path(dataset, data_dir)
+    if not os.path.isfile(path):
+        return None
+    current = {
+        (os.path.relpath(entry["path"], data_dir), entry["size"], entry["mtime_ns"])
+        for entry in catalog.select(dataset=dataset, data_dir=data_dir)
+    }
+    store = Store(path)
+    if store.sources() != current:
+        print(f"Store {path} is out of date, reading the archives instead", file=sys.stderr)
+        store.close()
+        return None
+    return store
+
+
+@contextlib.contextmanager
+def open_runs(entries, data_dir="data"):
+    """Open the runs of catalog entries (see catalog.select), and close them at the end of the with block.
+    Runs are read from the store of their dataset if it is up to date, otherwise from their .npz archive.
+    Either way, every run gives item access like np.load. Archives that cannot be read are skipped
+    with an error message.
+
+    Yields:
+        list: Run or datasets.Dataset of every entry, in the order of entries
+    """
+    sources = [os.path.relpath(entry["path"], data_dir) for entry in entries]
+    with contextlib.ExitStack() as stack:
+        with profiling.stage("load"):
+            runs = {}
+            for dataset in sorted({source.split(os.sep)[0] for source in sources}):
+                store = open_current_store(dataset, data_dir)
+                if store is not None:
+                    stack.enter_context(store)
+                    runs.update({source: store.run(source) for source in sources if source in store})
+            data_list = []
+            for entry, source in zip(entries, sources):
+                if source in runs:
+                    data_list.append(runs[source])
+                    continue
+                try:
+                    data_list.append(stack.enter_context(datasets.open_dataset(entry["path"])))
+                except Exception as e:
+                    print(f"Error loading {entry['path']}: {e}", file=sys.stderr)
+        yield data_list
+
+
+if __name__ == "__main__":
+    for dataset in sys.argv[1:]:
+        print(f"Wrote {convert_dataset(dataset)}")
@@ -0,0 +1,119 @@
+import numpy as np
+
+
+# ========= Streaming Error Estimation ====================
+
+
+class StreamingEOM:
+    """Online estimation of the mean and the error on the mean (EOM) of a timeseries.
+
+    The samples are kept in a logarithmic binning tree: level k holds the running statistics
+    (count, mean and sum of squared deviations) of the completed bins of size 2^k, and at most one
+    pending bin. Adding a sample costs O(log N) and the memory is O(log N), so the dyn_mean/dyn_eom
+    curves can be produced while sampling, instead of storing the full timeseries and calling
+    rebin_eom on growing prefixes of it.
+
+    The EOM uses the same heuristic as utils.rebin_eom: the largest binsize of the form 2^i
+    that leaves about num_of_bins / 2 bins.
+
+    Args:
+        num_of_bins (int): See utils.rebin_eom
+    """
+
+    def __init__(self, num_of_bins=20):
+        self.num_of_bins = num_of_bins
+        self.counts = []
+        self.means = []
+        self.m2s = []
+        self.pending = []
+
+    def __len__(self):
+        return self.counts[0] if self.counts else 0
+
+    def add(self, sample):
+        """Add a single sample (scalar or array) to the tree."""
+        carry = np.asarray(sample, dtype=float)
+        level = 0
+        while True:
+            if level == len(self.counts):
+                self.counts.append(0)
+                self.means.append(np.zeros_like(carry))
+                self.m2s.append(np.zeros_like(carry))
+                self.pending.append(None)
+            # Welford update of the statistics of the bins of size 2^level
+            self.counts[level] += 1
+            delta = carry - self.means[level]
+            self.means[level] = self.means[level] + delta / self.counts[level]
+            self.m2s[level] = self.m2s[level] + delta * (carry - self.means[level])
+            if self.pending[level] is None:
+                self.pending[level] = carry
+                return
+            carry = (self.pending[level] + carry) / 2
+            self.pending[level] = None
+            level += 1
+
+    def extend(self, samples):
+        """Add the samples of a timeseries, in order."""
+        for sample in samples:
+            self.add(sample)
+
+    def binning_level(self):
+        """Level (log2 of the binsize) used for the EOM estimation, as in utils.rebin_eom."""
+        N = len(self)
+        if N == 0:
+            return 0
+        max_exp = int(np.floor(np.log2(N / (self.num_of_bins / 2))))
+        return max(max_exp - 1, 0)
+
+    def mean(self):
+        """Mean of all samples added so far."""
+        if not self.counts:
+            return np.nan
+        return self.means[0]
+
+    def eom(self):
+        """Error on the mean of the samples added so far."""
+        level = self.binning_level()
+        if not self.counts or self.counts[level] < 2:
+            return np.nan
+        n = self.counts[level]
+        return np.sqrt(self.m2s[level] / (n - 1)) / np.sqrt(n)
+
+    def relative_eom(self):
+        """EOM / mean of the samples added so far."""
+        return self.eom() / self.mean()
+
+    def checkpoint(self):
+        """Current state of the estimation.
+
+        Returns:
+            tuple: (number of samples, mean, EOM, EOM / mean)
+        """
+        mean = self.mean()
+        eom = self.eom()
+        return len(self), mean, eom, eom / mean
+
+
+def dynamic_eom(arr, step_numbers, num_of_bins=20):
+    """Calculate the mean and the EOM of a timeseries at several step numbers,
+    i.e., the dyn_mean and dyn_eom curves, in a single pass over the data.
+
+    Args:
+        arr (np.ndarray): Timeseries of a measurement
+        step_numbers (np.ndarray): Increasing numbers of samples at which to evaluate
+
+    Returns:
+        tuple of
+            dyn_mean: np.ndarray with the mean of arr[:step] for every step
+            dyn_eom: np.ndarray with the EOM of arr[:step] for every step
+    """
+    estimator = StreamingEOM(num_of_bins)
+    dyn_mean = []
+    dyn_eom = []
+    start = 0
+    for step in step_numbers:
+        estimator.extend(arr[start:step])
+        start = max(start, step)
+        dyn_mean.append(estimator.mean())
+        dyn_eom.append(estimator.eom())
+    return np.asarray(dyn_mean), np.asarray(dyn_eom)
@@ -1,48 +1,254 @@
 
 
 import numpy as np
+import jackknife
+import bootstrap
 
 
 
 # ========= Error and Rebinning Functions ====================
 
 
-def autocorr_fft(arr):
-    arr = arr - np.mean(arr)
-    fft_vals = np.fft.fft(arr)
+def autocorr_fft(arr, axis=0):
+    arr = arr - np.mean(arr, axis=axis, keepdims=True)
+    fft_vals = np.fft.fft(arr, axis=axis)
     spectrum = fft_vals * np.conjugate(fft_vals)
-    dest = np.fft.ifft(spectrum)
-    return dest / dest[0]
+    dest = np.fft.ifft(spectrum, axis=axis)
+    return dest / np.take(dest, [0], axis=axis)
+
+
+def next_fast_len(n):
+    """Smallest 5-smooth number (of the form 2^a 3^b 5^c) that is not smaller than n, for which FFTs are fast."""
+    best = 1
+    while best < n:
+        best *= 2
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            p235 = p35
+            while p235 < n:
+                p235 *= 2
+            best = min(best, p235)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def autocorr_rfft(arr, max_lag=None, axis=0, circular=False):
+    """Calculate the autocorrelation of one or many real timeseries along axis with real FFTs.
+    The data is zero-padded to a fast FFT length of at least 2N - 1, which gives the linear
+    (not circular) autocorrelation, and only the first max_lag lags are returned.
 
+    Args:
+        arr (np.ndarray): Timeseries of a measurement, any number of additional axes
+        max_lag (int): Number of lags to return, all N lags if None
+        axis (int): Time axis
+        circular (bool): If True, do not pad, which gives the circular autocorrelation
+            (the real part of autocorr_fft)
+
+    Returns:
+        np.ndarray: Real autocorrelation normalized to 1 at lag 0, with max_lag elements along axis
+    """
+    arr = np.asarray(arr, dtype=float)
+    N = arr.shape[axis]
+    if max_lag is None:
+        max_lag = N
+    arr = arr - np.mean(arr, axis=axis, keepdims=True)
+    n_fft = N if circular else next_fast_len(2 * N - 1)
+    fft_vals = np.fft.rfft(arr, n=n_fft, axis=axis)
+    spectrum = fft_vals.real**2 + fft_vals.imag**2
+    dest = np.fft.irfft(spectrum, n=n_fft, axis=axis)
+    dest = np.take(dest, np.arange(min(max_lag, N)), axis=axis)
+    return dest / np.take(dest, [0], axis=axis)
+
+
+def autocorr_decay_time(autocorr_array, axis=0, N=None):
+    """Find the correlation decay time of one or many autocorrelation functions at once.
+    The decay time is the first lag at which two consecutive elements are below 1/100,
+    limited to N/10 so that at least 10 bins are left.
+
+    Args:
+        autocorr_array (np.ndarray): Autocorrelation function(s), with the lag along axis
+        N (int): Length of the timeseries, if autocorr_array is truncated. It has to hold at least N/10 + 1 lags.
+
+    Returns:
+        int or np.ndarray: Decay time for every series. The output shape is the input shape without axis.
+    """
+    autocorr_array = np.moveaxis(np.real(autocorr_array), axis, 0)
+    if N is None:
+        N = len(autocorr_array)
+    limit = min(int(np.ceil(N / 10)), len(autocorr_array) - 1)
+    below = autocorr_array <= 1 / 100
+    decayed = below[:limit] & below[1 : limit + 1]
+    decay_time = np.where(np.any(decayed, axis=0), np.argmax(decayed, axis=0), limit)
+    if decay_time.ndim == 0:
+        return int(decay_time)
+    return decay_time
+
+
+def integrated_autocorr_time(arr, axis=0, c=6, max_lag=None):
+    """Estimate the integrated autocorrelation time of one or many timeseries with the
+    automatic windowing procedure of Madras and Sokal: tau_int(W) = 1/2 + sum_{t=1}^{W} rho(t),
+    where the window W is the smallest lag with W >= c * tau_int(W).
+
+    Args:
+        arr (np.ndarray): Timeseries of a measurement, any number of additional axes
+        axis (int): Time axis
+        c (float): Window constant, values between 4 and 10 are common
+        max_lag (int): Largest lag considered for the window, N // 2 if None
+
+    Returns:
+        tuple of
+            tau_int: integrated autocorrelation time (in terms of step number)
+            tau_int_err: Madras-Sokal estimate of the error of tau_int
+            effective_samples: effective sample size N / (2 tau_int)
+            window: the window W of the summation
+        The output shapes are the input shape without axis.
+    """
+    arr = np.asarray(arr)
+    N = arr.shape[axis]
+    if max_lag is None:
+        max_lag = max(N // 2, 2)
+    return autocorr_tau_int(autocorr_rfft(arr, max_lag, axis), N, axis, c)
+
+
+def autocorr_tau_int(autocorr_array, N, axis=0, c=6):
+    """Integrated autocorrelation time from an autocorrelation function, e.g. a stored one,
+    with the automatic windowing of integrated_autocorr_time. If the window is not reached
+    within the given lags, the sum over all of them is returned.
 
-def rebin_array(a, R):
-    """Rebin an array into bins of length R"""
-    if isinstance(a, list):
-        a = np.asarray(a)
+    Args:
+        autocorr_array (np.ndarray): Normalized autocorrelation function(s), with the lag along axis
+        N (int): Length of the timeseries the autocorrelation function was computed from
+        axis (int): Lag axis
+        c (float): Window constant
+
+    Returns:
+        tuple: (tau_int, tau_int_err, effective_samples, window), see integrated_autocorr_time
+    """
+    autocorr_array = np.moveaxis(np.real(autocorr_array), axis, 0)
+    tau = 0.5 + np.cumsum(autocorr_array[1:], axis=0)  # tau[W - 1] = tau_int(W)
+    windows = np.arange(1, len(autocorr_array)).reshape((-1,) + (1,) * (tau.ndim - 1))
+    reached = windows >= c * tau
+    index = np.where(np.any(reached, axis=0), np.argmax(reached, axis=0), len(tau) - 1)
+    tau_int = np.take_along_axis(tau, index[np.newaxis], axis=0)[0]
+    window = index + 1
+    tau_int_err = tau_int * np.sqrt(2 * (2 * window + 1) / N)
+    effective_samples = N / (2 * tau_int)
+    return tau_int[()], tau_int_err[()], effective_samples[()], window[()]
+
+
+def autocorr_binsize(arr, method="threshold", axis=0):
+    """Find the correlation decay time of one or many timeseries, to be used as binsize.
+    The decay time is limited to N/10 so that at least 10 bins are left.
+
+    Args:
+        arr (np.ndarray): Timeseries of a measurement, any number of additional axes
+        method (str): "threshold" for the first two elements of the autocorrelation function that are below 1/100
+            (see autocorr_decay_time), "tau_int" for the automatic window of integrated_autocorr_time
+        axis (int): Time axis
+
+    Returns:
+        int or np.ndarray: Decay time for every series. The output shape is the input shape without axis.
+    """
+    arr = np.asarray(arr)
+    N = arr.shape[axis]
+    if method == "threshold":
+        # Only the lags up to the maximal decay time of N/10 are needed
+        max_lag = int(np.ceil(N / 10)) + 1
+        return autocorr_decay_time(autocorr_rfft(arr, max_lag, axis, circular=True), axis, N)
+    elif method == "tau_int":
+        _, _, _, window = integrated_autocorr_time(arr, axis)
+        return np.minimum(window, int(np.ceil(N / 10)))[()]
+    raise ValueError(f"Unknown method '{method}' for autocorr_binsize")
+
+
+def rebin_array(a, R, axis=0, weights=None, trailing="drop", return_weights=False):
+    """Rebin an array into bins of length R along axis.
+    The bins are a reshaped view of the input, shape (..., N // R, R, ...), that is averaged along
+    the new bin axis, so no intermediate copy of the input is made (unless weights are given).
+
+    Args:
+        a (np.ndarray): Timeseries of a measurement, any shape, e.g. (T, nlayer, nparams)
+        R (int): Binsize
+        axis (int): Time axis
+        weights (np.ndarray): Weights of the samples, shape (N,). Every bin is the weighted mean of its samples
+        trailing (str): "drop" the last N % R samples, or "keep" them as a shorter last bin
+        return_weights (bool): Also return the weight of every bin (its number of samples without weights),
+            e.g. to rebin the result again with the correct weight of a shorter last bin
+
+    Returns:
+        np.ndarray: Rebinned array, with N // R (ceil(N / R) if the trailing samples are kept) elements along axis,
+            or a tuple of it and the weights of the bins, shape (number of bins,)
+    """
+    a = np.asarray(a)
     R = int(R)
-    max_fit = int(len(a) - len(a) % R)
-    if a.ndim == 1:
-        # Shape (N): N samples of scalars
-        dest = np.mean(a[:max_fit].reshape(-1, R), axis=1)
-    elif a.ndim == 2:
-        # Shape (N,n,m): N samples of m-dim vecotrs
-        N, m = a.shape
-        dest = np.mean(a[:max_fit].reshape(-1, m, R), axis=2)
-    elif a.ndim == 3:
-        # Shape (N,n,m): N samples of n x m matrices
-        N, m, n = a.shape
-        dest = np.mean(a[:max_fit].reshape(-1, m, n, R), axis=3)
+    if trailing not in ("drop", "keep"):
+        raise ValueError(f"Unknown trailing mode '{trailing}' for rebin_array")
+    axis = range(a.ndim)[axis]  # non-negative, IndexError if out of bounds
+    N = a.shape[axis]
+    num_of_bins = N // R
+    max_fit = num_of_bins * R
+
+    index = [slice(None)] * a.ndim
+    index[axis] = slice(0, max_fit)
+    binned = a[tuple(index)].reshape(a.shape[:axis] + (num_of_bins, R) + a.shape[axis + 1 :])
+    # Shape that broadcasts a vector along axis
+    along_axis = lambda n: (1,) * axis + (n,) + (1,) * (a.ndim - axis - 1)
+    if weights is None:
+        dest = np.mean(binned, axis=axis + 1)
+        bin_weights = np.full(num_of_bins, float(R))
     else:
-        print("rebin_array not implemented for dimensions greater than 3.")
-        return a
+        weights = np.asarray(weights, dtype=float)
+        binned_weights = weights[:max_fit].reshape(num_of_bins, R)
+        bin_weights = np.sum(binned_weights, axis=1)
+        binned_weights = binned_weights.reshape((1,) * axis + (num_of_bins, R) + (1,) * (a.ndim - axis - 1))
+        dest = np.sum(binned * binned_weights, axis=axis + 1) / bin_weights.reshape(along_axis(num_of_bins))
+
+    if trailing == "keep" and max_fit < N:
+        index[axis] = slice(max_fit, None)
+        rest = a[tuple(index)]
+        if weights is None:
+            last_weight = float(N - max_fit)
+            last = np.mean(rest, axis=axis, keepdims=True)
+        else:
+            last_weight = np.sum(weights[max_fit:])
+            last = np.sum(rest * weights[max_fit:].reshape(along_axis(N - max_fit)), axis=axis, keepdims=True) / last_weight
+        dest = np.concatenate([dest, last], axis=axis)
+        bin_weights = np.append(bin_weights, last_weight)
+
+    if return_weights:
+        return dest, bin_weights
     return dest
 
 
+def binning_pyramid(arr, max_level):
+    """Generate the rebinned arrays with binsizes 1, 2, 4, ..., 2**max_level along the first axis.
+    Every level is obtained by pairwise averaging of the previous one (dropping an odd trailing bin),
+    so all levels together cost about 2N operations. The bins are the same as in rebin_array.
+
+    Args:
+        arr (np.ndarray): Timeseries of a measurement, shape (N, ...)
+        max_level (int): log2 of the largest binsize
+
+    Yields:
+        np.ndarray: Rebinned timeseries, shape (N // 2**level, ...)
+    """
+    data_rebin = np.asarray(arr)
+    yield data_rebin
+    for _ in range(max_level):
+        max_fit = len(data_rebin) - len(data_rebin) % 2
+        data_rebin = (data_rebin[0:max_fit:2] + data_rebin[1:max_fit:2]) / 2
+        yield data_rebin
+
+
 def rebin_error(arr):
-    """Rebin the given error to avoid autocorrelation in the error estimation
+    """Rebin the given error to avoid autocorrelation in the error estimation.
+    All binsizes are computed in a single pass with binning_pyramid.
 
     Args:
-        arr (np.ndarray): Timeseries of a measurement
+        arr (np.ndarray): Timeseries of a measurement, shape (N, ...) for stacked observables
 
     Returns:
         tuple: (value of binning, mean estimations, error on mean estimations, std dev estimations)
@@ -53,12 +259,10 @@ def rebin_error(arr):
     eomarr = []
     stdarr = []
     meanarr = []
-    for i in rangevals:
-        data_rebin = rebin_array(arr, i)
-        eom = np.std(data_rebin, ddof=1) / np.sqrt(len(data_rebin))
-        std = np.std(data_rebin, ddof=1)
-        eomarr.append(eom)
-        meanarr.append(np.mean(data_rebin))
+    for data_rebin in binning_pyramid(arr, max_exp):
+        std = np.std(data_rebin, ddof=1, axis=0)
+        eomarr.append(std / np.sqrt(len(data_rebin)))
+        meanarr.append(np.mean(data_rebin, axis=0))
         stdarr.append(std)
     return rangevals, meanarr, eomarr, stdarr
 
@@ -87,12 +291,13 @@ def rebin_eom(arr, num_of_bins=20):
     return eom
 
 
-def autocorr_rebin_eom(arr):
+def autocorr_rebin_eom(arr, method="threshold"):
     """Calculate the autocorrelation, and finds the corrrelation decay time (when the auto-correlation decays below 1/100)
     and calculate the error using bins with the correlation time size
 
     Args:
         arr (np.ndarray): Timeseries of a measurement
+        method (str): How to find the decay time, see autocorr_binsize
 
     Returns:
         tuple of
@@ -100,54 +305,45 @@ def autocorr_rebin_eom(arr):
             decay_time: float with the decay time (in terms of step number) of the autocorrelation
     """
     N = len(arr)
-    autocorr_array = autocorr_fft(arr)
-    for i in range(len(autocorr_array)):  # find first two elements below 1/100
-        if i >= N / 10:  # limit the number of bins to a minimum of 10.
-            eom = rebin_eom(arr, 10)
-            decay_time = i
-            return eom, decay_time
-        elif autocorr_array[i] <= 1 / 100 and autocorr_array[i + 1] <= 1 / 100:
-            num_of_bins = N // i
-            eom = rebin_eom(arr, num_of_bins)
-            decay_time = i
-            return eom, decay_time
+    decay_time = autocorr_binsize(arr, method)
+    if decay_time >= N / 10:  # limit the number of bins to a minimum of 10.
+        eom = rebin_eom(arr, 10)
+    else:
+        num_of_bins = N // decay_time
+        eom = rebin_eom(arr, num_of_bins)
+    return eom, decay_time
 
 
-def autocorr_rebin_data(arr):
+def autocorr_rebin_data(arr, method="threshold"):
     """
     Rebin the data to remove autocorrelation.
     The binsize is determined by the first two elements of the autocorrelation function that are below 1/100.
 
     Args:
         arr (np.ndarray): Timeseries of a measurement
+        method (str): How to find the binsize, see autocorr_binsize
     Returns:
         np.ndarray: Rebinend data
     """
-    N = len(arr)
-    autocorr_array = autocorr_fft(arr)
-    for i in range(len(autocorr_array)):  # find first two elements below 1/100
-        if i >= N / 10:  # limit the number of binsto a minimum of 10.
-            binsize = i
-            break
-        elif autocorr_array[i] <= 1 / 100 and autocorr_array[i + 1] <= 1 / 100:
-            binsize = i
-            break
+    binsize = autocorr_binsize(arr, method)
     rebinned_array = rebin_array(arr, binsize)
     return rebinned_array, binsize
 
 
-def jackknife_resampling(data):
+def jackknife_resampling(data, axis=0):
     """Generate jackknife resamples of the data."""
-    n = len(data)
-    indices = np.arange(n)
-    resamples = np.zeros(n)
-    for i in range(n):
-        resamples[i] = np.mean(data[indices != i])
-    return resamples
+    return jackknife.jackknife_resampling(data, axis)
+
+
+def grad_mean_estimator(op_mean, op_grad_mean, grad_norm_mean, op_times_grad_norm_mean):
+    """Gradient of the expectation value of an observable, as a function of the means of the timeseries.
+    See compute_grad_mean."""
+    return op_grad_mean + op_times_grad_norm_mean - op_mean * grad_norm_mean
 
 
 def jacknife_gradient_error_propagation(op_datavec, op_grad_datavec, grad_norm_datavec):
     """Calculate the error propagation of the gradient of an observable using jackknife resampling.
+    The gradient datavecs may hold many gradient components at once, with the samples along the first axis.
 
     Args:
         op_datavec (np.ndarray): Timeseries of the observable - rebinned data, i.e., not autocorrelation
@@ -156,43 +352,81 @@ def jacknife_gradient_error_propagation(op_datavec, op_grad_datavec, grad_norm_d
         - rebinned data, i.e., not autocorrelation
 
     Returns:
-        float: Error of the gradient of the observable
+        float or np.ndarray: Error of the gradient of the observable, one per gradient component
     """
-    op_datavec_resamples = jackknife_resampling(op_datavec)
-    op_grad_datavec_resamples = jackknife_resampling(op_grad_datavec)
-    grad_norm_datavec_resamples = jackknife_resampling(grad_norm_datavec)
-    op_times_grad_norm_resamples = jackknife_resampling(op_datavec * grad_norm_datavec)
-    mean_grad = np.mean(
-        op_grad_datavec_resamples
-        + op_times_grad_norm_resamples
-        - op_datavec_resamples * grad_norm_datavec_resamples
-    )
-    grad_jacknife = (
-        op_grad_datavec_resamples
-        + op_times_grad_norm_resamples
-        - op_datavec_resamples * grad_norm_datavec_resamples
+    op_datavec = np.reshape(op_datavec, (-1,) + (1,) * (np.ndim(op_grad_datavec) - 1))
+    _, grad_err = jackknife.jackknife(
+        grad_mean_estimator,
+        op_datavec,
+        op_grad_datavec,
+        grad_norm_datavec,
+        op_datavec * grad_norm_datavec,
     )
-    n = len(grad_jacknife)
+    return grad_err
 
-    return np.sqrt((n - 1) * np.mean((grad_jacknife - mean_grad) ** 2))
 
+def bootstrap_gradient_error_propagation(
+    op_datavec, op_grad_datavec, grad_norm_datavec, block_length=None, num_resamples=1000, seed=0, workers=1
+):
+    """Calculate the error propagation of the gradient of an observable with a moving block bootstrap.
+    Unlike jacknife_gradient_error_propagation, the timeseries are not rebinned first: the blocks
+    keep the autocorrelation, and all resamples of all gradient components are evaluated at once.
+
+    Args:
+        op_datavec (np.ndarray): Timeseries of the observable, shape (T,)
+        op_grad_datavec (np.ndarray): Timeseries of the gradient of the observable, shape (T, ...)
+        grad_norm_datavec (np.ndarray): Timeseries of the gradient of the norm of the ansatz divided by the norm of the ansatz
+        block_length (int): Length of the blocks, the largest autocorrelation decay time of the inputs
+            (see autocorr_binsize) if None
+        num_resamples (int): Number of bootstrap resamples
+        seed (int): Seed of the resampling, for reproducible errors
+        workers (int): Number of threads, see bootstrap.bootstrap_resamples
 
-def compute_grad_err(op_datavec, op_grad_datavec, grad_norm_datavec):
+    Returns:
+        tuple of
+            grad_err: bootstrap error of every gradient component, shape (...)
+            resamples: gradient on every resample, shape (num_resamples, ...), e.g. for bootstrap.confidence_interval
+    """
+    op_datavec = np.asarray(op_datavec)
+    op_grad_datavec = np.asarray(op_grad_datavec)
+    grad_norm_datavec = np.asarray(grad_norm_datavec)
+    if block_length is None:
+        block_length = max(
+            int(np.max(autocorr_binsize(datavec.reshape(len(datavec), -1))))
+            for datavec in (op_datavec, op_grad_datavec, grad_norm_datavec)
+        )
+    op_column = op_datavec.reshape((-1,) + (1,) * (op_grad_datavec.ndim - 1))
+    resamples = bootstrap.bootstrap_resamples(
+        grad_mean_estimator,
+        op_column,
+        op_grad_datavec,
+        grad_norm_datavec,
+        op_column * grad_norm_datavec,
+        num_resamples=num_resamples,
+        block_length=block_length,
+        seed=seed,
+        workers=workers,
+    )
+    return bootstrap.bootstrap_error(resamples), resamples
+
+
+def compute_grad_err(op_datavec, op_grad_datavec, grad_norm_datavec, method="threshold"):
     """Compute the error of the gradient of an observable.
 
     Args:
         op_datavec(np.ndarray): Timeseries of the observable
         op_grad_datavec(np.ndarray): Timeseries of the gradient of the observable
         grad_norm_datavec(np.ndarray): Timeseries of the gradient of the norm of the ansatz divided by the norm of the ansatz
+        method (str): How to find the binsizes, see autocorr_binsize
     Returns:
         float: Error of the gradient of the observable
     """
-    op_datavec_rebinned, op_datavec_rebinned_binsize = autocorr_rebin_data(op_datavec)
+    op_datavec_rebinned, op_datavec_rebinned_binsize = autocorr_rebin_data(op_datavec, method)
     op_grad_datavec_rebinned, op_grad_datavec_rebinned_binsize = autocorr_rebin_data(
-        op_grad_datavec
+        op_grad_datavec, method
     )
     grad_norm_datavec_rebinned, grad_norm_datavec_rebinned_binsize = (
-        autocorr_rebin_data(grad_norm_datavec)
+        autocorr_rebin_data(grad_norm_datavec, method)
     )
     max_binsize = max(
         op_datavec_rebinned_binsize,
@@ -231,3 +465,57 @@ def compute_grad_mean(op_datavec, op_grad_datavec, grad_norm_datavec):
     return mean
 
 
+def compute_grad_mean_batch(op_datavec, op_grad_datavec, grad_norm_datavec):
+    """Compute the mean of many gradient components of an observable at once.
+
+    Args:
+        op_datavec(np.ndarray): Timeseries of the observable, shape (T,)
+        op_grad_datavec(np.ndarray): Timeseries of the gradient components of the observable, shape (T, ...)
+        grad_norm_datavec(np.ndarray): Timeseries of the gradient components of the norm of the ansatz divided by the norm of the ansatz, shape (T, ...)
+    Returns:
+        np.ndarray: Mean of every gradient component, shape (...)
+    """
+    op_datavec = np.asarray(op_datavec)
+    op_datavec = op_datavec.reshape((-1,) + (1,) * (np.ndim(op_grad_datavec) - 1))
+    mean = np.mean(op_grad_datavec + op_datavec * grad_norm_datavec, axis=0)
+    mean = mean - np.mean(op_datavec) * np.mean(grad_norm_datavec, axis=0)
+    return mean
+
+
+def compute_grad_err_batch(op_datavec, op_grad_datavec, grad_norm_datavec, method="threshold"):
+    """Compute the error of many gradient components of an observable at once.
+    Equivalent to calling compute_grad_err for every component, but the autocorrelation of the
+    observable is computed only once, and the autocorrelations of the gradient components are
+    computed column-wise along the time axis. Components that share a binsize are rebinned and
+    resampled together.
+
+    Args:
+        op_datavec(np.ndarray): Timeseries of the observable, shape (T,)
+        op_grad_datavec(np.ndarray): Timeseries of the gradient components of the observable, shape (T, ...)
+        grad_norm_datavec(np.ndarray): Timeseries of the gradient components of the norm of the ansatz divided by the norm of the ansatz, shape (T, ...)
+        method (str): How to find the binsizes, see autocorr_binsize
+    Returns:
+        np.ndarray: Error of every gradient component, shape (...)
+    """
+    op_datavec = np.asarray(op_datavec)
+    op_grad_datavec = np.asarray(op_grad_datavec)
+    components_shape = op_grad_datavec.shape[1:]
+    T = len(op_datavec)
+    op_grad_datavec = op_grad_datavec.reshape(T, -1)
+    grad_norm_datavec = np.asarray(grad_norm_datavec).reshape(T, -1)
+
+    op_binsize = autocorr_binsize(op_datavec, method)
+    op_grad_binsize = autocorr_binsize(op_grad_datavec, method)
+    grad_norm_binsize = autocorr_binsize(grad_norm_datavec, method)
+    # All arrays should be of the same size, so we pick the largest binsize per component
+    binsizes = np.maximum(np.maximum(op_grad_binsize, grad_norm_binsize), op_binsize)
+
+    grad_err = np.empty(op_grad_datavec.shape[1])
+    for binsize in np.unique(binsizes):
+        columns = binsizes == binsize
+        grad_err[columns] = jacknife_gradient_error_propagation(
+            rebin_array(op_datavec, binsize),
+            rebin_array(op_grad_datavec[:, columns], binsize),
+            rebin_array(grad_norm_datavec[:, columns], binsize),
+        )
+    return grad_err.reshape(components_shape)
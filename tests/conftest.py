@@ -0,0 +1,6 @@
+import os
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, "plotting_scripts"))
+sys.path.insert(0, root)
@@ -0,0 +1,13 @@
+import pytest
+
+import benchmark
+
+
+@pytest.mark.parametrize("name", list(benchmark.references))
+def test_case_matches_reference_implementation(name):
+    assert benchmark.check_references([name]) == []
+
+
+def test_rewritten_functions_have_references():
+    rewritten = ["rebin_array", "rebin_error", "rebin_eom", "jackknife_resampling"]
+    assert {name for function in rewritten for name in (function, f"{function}[stacked]")} <= set(benchmark.references)
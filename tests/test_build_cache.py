@@ -0,0 +1,30 @@
+import os
+
+import build_cache
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_style_edit_makes_figure_stale(tmp_path):
+    scripts_dir = str(tmp_path / "plotting_scripts")
+    script = os.path.join(scripts_dir, "figure.py")
+    style = os.path.join(scripts_dir, "plotting_formats", "plot_format.py")
+    output = str(tmp_path / "figure.pdf")
+    write(script, 'import plotting\n\nplotting.pyplot("plot_format")\n')
+    write(os.path.join(scripts_dir, "plotting.py"), "import importlib\n")
+    write(style, 'plt.rcParams["font.size"] = 10\n')
+    write(output, "")
+
+    cache = build_cache.load_cache(str(tmp_path / "cache.json"))
+    assert style in build_cache.imported_helpers(script, scripts_dir)
+    digest = build_cache.script_digest(script, scripts_dir, [], cache)
+    build_cache.record("figure", digest, cache)
+    assert not build_cache.is_stale("figure", build_cache.script_digest(script, scripts_dir, [], cache), [output], cache)
+
+    write(style, 'plt.rcParams["font.size"] = 12.5\n')
+    digest = build_cache.script_digest(script, scripts_dir, [], cache)
+    assert build_cache.is_stale("figure", digest, [output], cache)
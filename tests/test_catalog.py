@@ -0,0 +1,22 @@
+import os
+
+import numpy as np
+
+import catalog
+
+
+def test_select_rewalks_only_after_a_directory_changed(tmp_path, monkeypatch):
+    data_dir = str(tmp_path / "data")
+    os.makedirs(os.path.join(data_dir, "gf"))
+    np.savez(os.path.join(data_dir, "gf", "a.npz"), L=4, steps=np.arange(3))
+    assert [entry["fields"]["L"] for entry in catalog.select(dataset="gf", data_dir=data_dir)] == [4]
+
+    updates = []
+    update_catalog = catalog.update_catalog
+    monkeypatch.setattr(catalog, "update_catalog", lambda *args: updates.append(args) or update_catalog(*args))
+    catalog.select(dataset="gf", data_dir=data_dir)
+    assert not updates
+
+    np.savez(os.path.join(data_dir, "gf", "b.npz"), L=6, steps=np.arange(3))
+    assert [entry["fields"]["L"] for entry in catalog.select(dataset="gf", data_dir=data_dir)] == [4, 6]
+    assert len(updates) == 1
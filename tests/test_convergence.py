@@ -0,0 +1,12 @@
+import numpy as np
+
+import convergence
+
+
+def test_extend_interpolates_the_checkpoint_times():
+    monitor = convergence.ConvergenceMonitor(target=1e-3, check_every=100)
+    samples = 1 + 0.1 * np.random.default_rng(0).standard_normal(1000)
+    monitor.extend(samples[:400], elapsed=4.0)
+    monitor.extend(samples[400:], elapsed=10.0)
+    assert monitor.steps == list(range(100, 1001, 100))
+    np.testing.assert_allclose(monitor.times, [1, 2, 3, 4, 5, 6, 7, 8, 9, 10])
@@ -0,0 +1,22 @@
+import numpy as np
+
+import efficiency
+
+
+def result(seconds, steps):
+    return {"seconds_to_target": seconds, "steps_to_target": steps}
+
+
+def test_runs_without_a_cost_are_ranked_last_and_not_recommended():
+    ranked = [
+        ("n=1", result(np.nan, np.nan)),
+        ("n=2", result(20.0, 2e3)),
+        ("n=3", result(np.nan, np.nan)),
+        ("n=4", result(10.0, 1e3)),
+    ]
+    ranked.sort(key=lambda item: efficiency._cost(item[1]))
+    assert [choice for choice, _ in ranked[:2]] == ["n=4", "n=2"]
+    assert efficiency.recommendations({("eom_us", "L=4"): ranked}) == {("eom_us", "L=4"): ("n=4", 2.0)}
+
+    unknown = [("n=1", result(np.nan, np.nan))]
+    assert efficiency.recommendations({("eom_us", "L=6"): unknown}) == {}
@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+
+import figures
+
+
+def test_expression_loads_constant_slices():
+    expression = figures.Expression("abs(autocorr[:50]) / steps[1:, 0] + np.log(steps[i, 1])")
+    assert expression.keys == ["steps", "i", ("autocorr", ((None, 50, None),)), ("steps", ((1, None, None), 0))]
+
+    steps = np.arange(12.0).reshape(6, 2)
+    run = {
+        "steps": steps,
+        "i": 2,
+        ("autocorr", ((None, 50, None),)): -np.ones(5),
+        ("steps", ((1, None, None), 0)): steps[1:, 0],
+    }
+    np.testing.assert_allclose(expression(run), 1 / steps[1:, 0] + np.log(steps[2, 1]))
+
+
+def test_decimate_without_x(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join("data", "curves"))
+    eom = 1 / np.sqrt(np.arange(1, 10001))
+    np.savez(os.path.join("data", "curves", "run.npz"), n=2, eom=eom)
+    panel = {"select": {"dataset": "curves"}, "key": "n", "y": "eom", "decimate": True}
+
+    [(value, x, y)] = figures.compute_panel(panel)
+    assert value == 2
+    assert len(x) == len(y) < len(eom)
+    np.testing.assert_array_equal(y, eom[x])
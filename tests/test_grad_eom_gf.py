@@ -0,0 +1,59 @@
+import os
+import tracemalloc
+
+import numpy as np
+
+import grad_eom_gf
+import paper_plots
+
+
+def write_grad_file(path, T=2000, nlayer=2, nparams=3, seed=0):
+    rng = np.random.default_rng(seed)
+    shape = (T, nlayer, nparams)
+    np.savez_compressed(
+        path,
+        energy_ts=1 + 0.1 * rng.standard_normal(T),
+        g_el=0.5,
+        g_mass=0.2,
+        g_int=1.0,
+        nlayer=nlayer,
+        nparams=nparams,
+        el_grad_ts=1 + rng.standard_normal(shape),
+        mass_grad_ts=rng.standard_normal(shape),
+        int_grad_ts=rng.standard_normal(shape),
+        grad_norm_ts=rng.standard_normal(shape),
+    )
+
+
+def test_map_files_in_parallel_when_loaded_by_paper_plots(tmp_path, monkeypatch):
+    monkeypatch.setenv("PAPER_PLOTS_STATS_CACHE", "0")
+    files = [str(tmp_path / f"run_{i}.npz") for i in range(3)]
+    for i, path in enumerate(files):
+        write_grad_file(path, seed=i)
+
+    module = paper_plots.load_script("grad_eom_gf")
+    parallel = module.map_files(files, workers=2)
+    serial = module.map_files(files, workers=1)
+    assert len(parallel) == len(files)
+    for a, b in zip(parallel, serial):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_process_single_file_stays_under_the_memory_budget(tmp_path, monkeypatch):
+    monkeypatch.setenv("PAPER_PLOTS_STATS_CACHE", "0")
+    path = str(tmp_path / "run.npz")
+    write_grad_file(path, T=20000, nlayer=4, nparams=16)
+
+    budget = 16 * 2**20
+    tracemalloc.start()
+    try:
+        eom, mean = grad_eom_gf.process_single_file(path, budget)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak <= budget
+    assert len(list(grad_eom_gf.component_blocks(4, 16, budget // (grad_eom_gf.bytes_per_sample * 20000)))) > 1
+
+    full_eom, full_mean = grad_eom_gf.process_single_file(path, 2**40)
+    np.testing.assert_allclose(eom, full_eom)
+    np.testing.assert_allclose(mean, full_mean)
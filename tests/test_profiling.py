@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+
+scripts_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "plotting_scripts")
+
+
+def run(tmp_path, code):
+    env = dict(os.environ, PAPER_PLOTS_PROFILE=str(tmp_path / "profiles"))
+    subprocess.run([sys.executable, "-c", f"import sys; sys.path.insert(0, {scripts_dir!r}); {code}"], env=env, check=True)
+    return os.listdir(tmp_path / "profiles") if os.path.isdir(tmp_path / "profiles") else []
+
+
+def test_importing_the_helpers_writes_no_trace(tmp_path):
+    assert run(tmp_path, "import profiling; profiling.stage('discover')(lambda: None)()") == []
+
+
+def test_scripts_write_their_trace_at_exit(tmp_path):
+    code = "import profiling; profiling.write_at_exit(); profiling.stage('discover')(lambda: None)()"
+    assert sorted(os.path.splitext(name)[1] for name in run(tmp_path, code)) == [".csv", ".json"]
@@ -0,0 +1,27 @@
+import os
+
+import numpy as np
+
+import stats_cache
+
+
+def test_disk_tier_is_only_scanned_when_full(tmp_path, monkeypatch):
+    directory = str(tmp_path / "stats")
+    monkeypatch.setenv(stats_cache.env_var, directory)
+    monkeypatch.setattr(stats_cache, "max_disk_bytes", 30000)
+    monkeypatch.setattr(stats_cache, "max_memory_bytes", 0)
+    scans = []
+    scan = stats_cache._scan
+    monkeypatch.setattr(stats_cache, "_scan", lambda d: scans.append(d) or scan(d))
+
+    double = stats_cache.memoize(lambda a: 2 * a)
+    for i in range(5):
+        double(np.full(500, i, dtype=float))
+    assert len(scans) == 1
+
+    for i in range(5, 20):
+        double(np.full(500, i, dtype=float))
+    sizes = [os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)]
+    assert 1 < len(scans) < 15
+    assert sum(sizes) <= stats_cache.max_disk_bytes
+    assert stats_cache._disk_bytes[directory] == sum(sizes)